@@ -0,0 +1,249 @@
+"""
+times the Playlist and Filter operations on synthetic libraries of growing size, to catch the paths that only get slow on
+large libraries
+
+    python benchmarks/bench_playlist.py --sizes 1000 10000 --output results.json
+    python benchmarks/bench_playlist.py --baseline results.json --threshold 0.25
+
+results are written as json, and comparing against a baseline exits with status 1 when an operation got slower than the
+threshold allows
+"""
+import os
+import sys
+import gc
+import json
+import time
+import random
+import argparse
+import platform
+import itertools
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shellac import Song, Playlist, Filter
+
+
+artists = [f'artist{i}' for i in range(1000)]
+genres = [f'genre{i}' for i in range(30)]
+batches = itertools.count()  # numbers the songs added by each run, so their names never clash
+
+
+def synthetic_songs(n, rng, prefix='song'):
+    """
+    n songs with names, lengths, weights and tags but no audio: passing a name and length to Song skips the tinytag probe
+    """
+    return [Song(f'/library/{prefix}{i}.mp3', f'{prefix}{i}', weight=rng.randint(1, 5),
+                 tags=[rng.choice(artists)] + rng.sample(genres, rng.randint(1, 3)), length=rng.uniform(60, 600))
+            for i in range(n)]
+
+
+def timed(function, *args):
+    """
+    seconds taken by function(*args), with the garbage collector held off as timeit does
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        function(*args)
+        return time.perf_counter() - start
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def bench_extend(playlist, songs, rng, ops):
+    fresh = Playlist()
+    return timed(fresh.extend, songs), len(songs)
+
+
+def bench_add(playlist, songs, rng, ops):
+    new = synthetic_songs(ops, rng, prefix=f'added{next(batches)}-')
+    positions = [rng.randrange(len(playlist.list) + 1) for _ in new]
+
+    def run():
+        for song, position in zip(new, positions):
+            playlist.add(song, position)
+    seconds = timed(run)
+    playlist.delete(new)
+    return seconds, ops
+
+
+def bench_delete(playlist, songs, rng, ops):
+    new = synthetic_songs(ops, rng, prefix=f'deleted{next(batches)}-')
+    for song in new:
+        playlist.add(song, rng.randrange(len(playlist.list) + 1))
+    rng.shuffle(new)
+
+    def run():
+        for song in new:
+            playlist.delete(song)
+    return timed(run), ops
+
+
+def bench_set_filter_tags(playlist, songs, rng, ops):
+    seconds = timed(playlist.set_filter, Filter('', [[('genre1', True)], [('genre2', True), ('genre3', False)]]))
+    playlist.set_filter(Filter())
+    return seconds, 1
+
+
+def bench_set_filter_regex(playlist, songs, rng, ops):
+    seconds = timed(playlist.set_filter, Filter('7$', [[('genre1', True)]], strict=False))
+    playlist.set_filter(Filter())
+    return seconds, 1
+
+
+def bench_random(playlist, songs, rng, ops):
+    def run():
+        last = None
+        for _ in range(ops):
+            last = playlist.random(last)[1]
+    return timed(run), ops
+
+
+def bench_change_position(playlist, songs, rng, ops):
+    moves = [(playlist[rng.randrange(len(playlist))], rng.randrange(len(playlist) + 1)) for _ in range(ops)]
+
+    def run():
+        for song, to in moves:
+            playlist.change_position(song, to)
+    return timed(run), ops
+
+
+def bench_get_filtered_position(playlist, songs, rng, ops):
+    playlist.set_filter(Filter('', [[('genre1', True)]]))
+    positions = [rng.randrange(len(playlist.list)) for _ in range(ops)]
+
+    def run():
+        for position in positions:
+            playlist.get_filtered_position(position)
+    seconds = timed(run)
+    playlist.set_filter(Filter())
+    return seconds, ops
+
+
+def bench_model_set_playlist(playlist, songs, rng, ops):
+    """
+    resetting the table model onto the playlist and formatting the first screen of rows, as the view does after a reset
+    """
+    from shellac.model import PlaylistModel
+    model = PlaylistModel()
+
+    def run():
+        model.set_playlist(playlist)
+        for row in range(min(40, model.rowCount())):
+            for column in range(model.columnCount()):
+                model.data(model.index(row, column))
+    seconds = timed(run)
+    model.set_playlist(None)
+    return seconds, 1
+
+
+benchmarks = {
+    'extend': bench_extend,
+    'add': bench_add,
+    'delete': bench_delete,
+    'set_filter_tags': bench_set_filter_tags,
+    'set_filter_regex': bench_set_filter_regex,
+    'random': bench_random,
+    'change_position': bench_change_position,
+    'get_filtered_position': bench_get_filtered_position,
+}
+
+
+def run(sizes, repeat, ops, names, seed=0):
+    """
+    the best of repeat timings of every benchmark at every size, as {name: {size: {'seconds', 'ops', 'per_op'}}}
+    """
+    results = {name: {} for name in names}
+    for size in sizes:
+        rng = random.Random(seed)
+        songs = synthetic_songs(size, rng)
+        playlist = Playlist()
+        playlist.extend(songs)
+        for name in names:
+            best, count = min(benchmarks[name](playlist, songs, rng, ops) for _ in range(repeat))
+            results[name][str(size)] = {'seconds': best, 'ops': count, 'per_op': best / count}
+            print(f'{name:<24}{size:>9}{best * 1000:>12.3f} ms{best / count * 1e6:>12.2f} us/op', flush=True)
+        del songs, playlist
+        gc.collect()
+    return results
+
+
+def compare(results, baseline, threshold, floor):
+    """
+    prints how every timing moved against the baseline, and returns the (name, size, ratio) of those slower by more
+    than threshold; differences under floor seconds are taken as noise
+    """
+    regressions = []
+    for name, timings in results.items():
+        for size, entry in timings.items():
+            old = baseline.get(name, {}).get(size)
+            if old is None:
+                continue
+            # per operation, so runs with a different --ops still compare
+            ratio = entry['per_op'] / old['per_op'] if old['per_op'] > 0 else float('inf')
+            regressed = ratio > 1 + threshold and (entry['per_op'] - old['per_op']) * entry['ops'] > floor
+            print(f'{name:<24}{size:>9}{old["per_op"] * 1e6:>12.2f} ->{entry["per_op"] * 1e6:>10.2f} us/op  x{ratio:.2f}'
+                  + ('  REGRESSION' if regressed else ''))
+            if regressed:
+                regressions.append((name, size, ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark Playlist and Filter operations on synthetic libraries.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=3, help='runs of each benchmark, of which the fastest is kept')
+    parser.add_argument('--ops', type=int, default=200, help='operations timed by the per-song benchmarks')
+    parser.add_argument('--only', nargs='+', choices=sorted(benchmarks) + ['model_set_playlist'], help='benchmarks to run')
+    parser.add_argument('--qt', action='store_true', help='also time PlaylistModel.set_playlist, which needs PyQt6')
+    parser.add_argument('--output', help='json file to write the results to')
+    parser.add_argument('--baseline', help='json results of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed slowdown against the baseline, 0.25 being 25%%')
+    parser.add_argument('--floor', type=float, default=0.001, help='slowdowns of fewer seconds than this are ignored')
+    args = parser.parse_args(argv)
+
+    names = list(args.only or benchmarks)
+    if args.qt and 'model_set_playlist' not in names:
+        names.append('model_set_playlist')
+    if 'model_set_playlist' in names:
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        from PyQt6.QtWidgets import QApplication
+        app = QApplication.instance() or QApplication(sys.argv[:1])
+        benchmarks['model_set_playlist'] = bench_model_set_playlist
+
+    baseline = None
+    if args.baseline:
+        try:
+            with open(args.baseline) as f:
+                baseline = json.load(f)['results']
+        except (OSError, ValueError, KeyError) as e:
+            print(f'ERROR: Could not read the baseline {args.baseline}: {e}')
+            return 2
+
+    results = run(args.sizes, args.repeat, args.ops, names)
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'repeat': args.repeat,
+        'ops': args.ops,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=1)
+
+    if baseline is not None:
+        print()
+        regressions = compare(results, baseline, args.threshold, args.floor)
+        if regressions:
+            print(f'{len(regressions)} benchmark(s) slower than the baseline by more than {args.threshold:.0%}')
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
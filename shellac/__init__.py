@@ -0,0 +1,13 @@
+"""
+the core of Shellac: songs, playlists, filters, the library and the background importing, analysis, download and transcoding
+workers, all usable without a display. playback needs QtMultimedia and is imported from shellac.playback, and the user
+interface lives in shellac.gui
+"""
+from .util import audio_formats, video_formats, std_time
+from .cache import MetadataCache
+from .filter import Filter
+from .song import Song
+from .playlist import Playlist
+from .index import ContentIndex
+from .importer import FolderImporter, PlaylistLoader, LibraryLoader
+from .library import Library
@@ -0,0 +1,184 @@
+"""
+waveform and loudness analysis of audio files on background workers
+"""
+import os
+import queue
+import hashlib
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .util import ffmpeg_bin, popen_low_priority
+from .cache import MetadataCache
+
+
+def decode_pcm(path, rate=8000):
+    """
+    decodes an audio file to mono 16-bit samples at rate through ffmpeg
+    """
+    process = subprocess.run([ffmpeg_bin(), '-loglevel', 'error', '-i', path, '-vn', '-ac', '1', '-ar', str(rate), '-f', 's16le', '-'],
+                             stdin=subprocess.DEVNULL, capture_output=True)
+    if process.returncode != 0:
+        raise Exception(process.stderr.decode(errors='replace').strip().split('\n')[-1])
+    return np.frombuffer(process.stdout, dtype=np.int16)
+
+
+def waveform_peaks(samples, levels=(4096, 1024, 256)):
+    """
+    the loudest sample in each of levels[i] equal stretches of the track, scaled to 0-255; every coarser level
+    is reduced from the finest one, so levels must divide levels[0]
+    """
+    finest = levels[0]
+    if len(samples) == 0:
+        return {bins: np.zeros(bins, dtype=np.uint8) for bins in levels}
+    samples = np.abs(samples.astype(np.int32))
+    peaks = np.maximum.reduceat(samples, (np.arange(finest) * len(samples)) // finest)
+    peaks = np.minimum(peaks * 255 // 32767, 255).astype(np.uint8)
+    return {bins: peaks.reshape(bins, -1).max(axis=1) for bins in levels}
+
+
+class WaveformCache:
+    """
+    waveform peaks of tracks, computed on a background worker and kept as .npz files in a directory,
+    dropping the least recently used files beyond max_entries
+    """
+    def __init__(self, directory, max_entries=1000):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.pool = ThreadPoolExecutor(1)
+        self.results = queue.Queue()  # (path, peaks or None) for every request
+        self.pending = set()
+
+    def file(self, path):
+        size, mtime = MetadataCache.stat(path)
+        return os.path.join(self.directory, hashlib.blake2b(f'{path}|{size}|{mtime}'.encode(), digest_size=16).hexdigest() + '.npz')
+
+    def get(self, path):
+        try:
+            file = self.file(path)
+            with np.load(file) as data:
+                peaks = {int(key[1:]): data[key] for key in data.files}
+            os.utime(file)  # marks it as recently used
+            return peaks
+        except (OSError, ValueError):
+            return None
+
+    def put(self, path, peaks):
+        os.makedirs(self.directory, exist_ok=True)
+        file = self.file(path)
+        with open(file + '.tmp', 'wb') as f:
+            np.savez(f, **{f'l{bins}': level for bins, level in peaks.items()})
+        os.replace(file + '.tmp', file)
+        self.evict()
+
+    def evict(self):
+        files = [os.path.join(self.directory, i) for i in os.listdir(self.directory) if i.endswith('.npz')]
+        if len(files) <= self.max_entries:
+            return
+        files.sort(key=lambda i: os.stat(i).st_mtime)
+        for file in files[:len(files) - self.max_entries]:
+            os.remove(file)
+
+    def request(self, path):
+        """
+        computes the peaks of path in the background unless already underway, queueing them up in results
+        """
+        if path in self.pending:
+            return
+        self.pending.add(path)
+        self.pool.submit(self.compute, path)
+
+    def compute(self, path):
+        peaks = self.get(path)
+        try:
+            if peaks is None:
+                peaks = waveform_peaks(decode_pcm(path))
+                self.put(path, peaks)
+        except Exception as e:
+            print(f'ERROR: Could not draw the waveform of {path}: {e}')
+        self.results.put((path, peaks))
+        self.pending.discard(path)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def measure_loudness(path):
+    """
+    the integrated loudness in LUFS (per ITU-R BS.1770, None for silence) and sample peak of a track; ffmpeg applies
+    the K-weighting and hands over raw and weighted stereo side by side, which are reduced in 5 second chunks
+    """
+    rate = 48000
+    step = rate // 10  # gating blocks are 400 ms long and start every 100 ms
+    graph = ('[0:a]aresample=48000,aformat=sample_fmts=flt:channel_layouts=stereo,asplit[raw][k];'
+             '[k]biquad=b0=1.53512485958697:b1=-2.69169618940638:b2=1.19839281085285:a0=1:a1=-1.69065929318241:a2=0.73248077421585,'
+             'biquad=b0=1:b1=-2:b2=1:a0=1:a1=-1.99004745483398:a2=0.99007225036621[weighted];[raw][weighted]amerge=inputs=2')
+    process = popen_low_priority([ffmpeg_bin(), '-loglevel', 'error', '-i', path, '-vn', '-filter_complex', graph, '-f', 'f32le', '-'],
+                                 stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    energies = []  # summed squares of the weighted channels over each 100 ms
+    peak = 0.0
+    rest = np.empty((0, 2), dtype=np.float32)
+    while chunk := process.stdout.read(step * 50 * 16):
+        frames = np.frombuffer(chunk, dtype=np.float32).reshape(-1, 4)
+        if len(frames):
+            peak = max(peak, float(np.abs(frames[:, :2]).max()))
+        weighted = np.concatenate([rest, frames[:, 2:]])
+        whole = len(weighted) // step * step
+        energies.append(np.square(weighted[:whole], dtype=np.float64).sum(axis=1).reshape(-1, step).sum(axis=1))
+        rest = weighted[whole:]
+    process.wait()
+    if process.returncode != 0:
+        raise Exception(process.stderr.read().decode(errors='replace').strip().split('\n')[-1])
+    energies = np.concatenate(energies) if energies else np.empty(0)
+    if len(energies) < 4:
+        return None, peak
+    blocks = np.convolve(energies, np.ones(4), 'valid') / (4 * step)
+    with np.errstate(divide='ignore'):
+        loudness = -0.691 + 10 * np.log10(blocks)
+    gated = blocks[loudness > -70]
+    if len(gated) == 0:
+        return None, peak
+    relative = -0.691 + 10 * np.log10(gated.mean()) - 10
+    gated = gated[-0.691 + 10 * np.log10(gated) > relative]
+    return float(-0.691 + 10 * np.log10(gated.mean())), peak
+
+
+class LoudnessAnalyzer:
+    """
+    measures the loudness of tracks on a pool of low-priority ffmpeg processes, keeping the results in a MetadataCache
+    """
+    def __init__(self, cache, workers=None):
+        self.cache = cache
+        self.pool = ThreadPoolExecutor(workers or max(1, (os.cpu_count() or 2) // 2))
+        self.results = queue.Queue()  # (path, loudness, peak) for every request
+        self.pending = set()
+
+    def get(self, path):
+        """
+        the cached (loudness, peak) of path, or None if it has not been measured
+        """
+        entry = self.cache.get(path) if self.cache is not None else None
+        if entry is None or 'peak' not in entry:
+            return None
+        return entry['loudness'], entry['peak']
+
+    def request(self, path):
+        if path in self.pending:
+            return
+        self.pending.add(path)
+        self.pool.submit(self.analyse, path)
+
+    def analyse(self, path):
+        loudness, peak = None, None
+        try:
+            loudness, peak = measure_loudness(path)
+            if self.cache is not None:
+                self.cache.put(path, loudness=loudness, peak=peak)
+        except Exception as e:
+            print(f'ERROR: Could not measure the loudness of {path}: {e}')
+        self.results.put((path, loudness, peak))
+        self.pending.discard(path)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,106 @@
+"""
+a persistent json cache of per-file metadata, validated against the size and modification time of each file
+"""
+import os
+import json
+import time
+from threading import Lock
+
+
+class MetadataCache:
+    """
+    persistent cache of probed file metadata, keyed by path and only trusted while the file's size and mtime match
+    """
+    def __init__(self, path, max_entries=100000):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = {}
+        self.dirty = False
+        self.lock = Lock()  # songs are probed from importer threads
+
+    def load(self):
+        try:
+            with open(self.path, encoding='UTF-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = {}
+        with self.lock:
+            self.entries = entries
+            self.dirty = False
+
+    def flush(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            self.compact()
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path + '.tmp', mode='w', encoding='UTF-8') as f:
+                json.dump(self.entries, f, separators=(',', ':'))
+            os.replace(self.path + '.tmp', self.path)
+            self.dirty = False
+
+    @staticmethod
+    def stat(path):
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns
+
+    def get(self, path):
+        entry = self.entries.get(path)
+        if entry is None:
+            return None
+        try:
+            size, mtime = self.stat(path)
+        except OSError:
+            return None
+        with self.lock:
+            if entry['size'] != size or entry['mtime'] != mtime:
+                self.entries.pop(path, None)
+                self.dirty = True
+                return None
+            entry['used'] = time.time()
+            self.dirty = True  # the recency decides what compact keeps, so it has to be saved too
+        return entry
+
+    def put(self, path, **fields):
+        size, mtime = self.stat(path)
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is None or entry['size'] != size or entry['mtime'] != mtime:
+                entry = {'size': size, 'mtime': mtime}
+                self.entries[path] = entry
+            entry.update(fields)
+            entry['used'] = time.time()
+            self.dirty = True
+        return entry
+
+    def invalidate(self):
+        """
+        drops every entry whose file has been removed or modified since it was cached, and returns how many were dropped
+        """
+        stale = []
+        for path, entry in self.entries.items():
+            try:
+                if (entry['size'], entry['mtime']) != self.stat(path):
+                    stale.append(path)
+            except OSError:
+                stale.append(path)
+        for path in stale:
+            del self.entries[path]
+        if stale:
+            self.dirty = True
+        return len(stale)
+
+    def compact(self):
+        """
+        keeps the cache within max_entries: stale entries go first, then the least recently used ones
+        """
+        if len(self.entries) <= self.max_entries:
+            return
+        self.invalidate()
+        if len(self.entries) <= self.max_entries:
+            return
+        keep = sorted(self.entries.items(), key=lambda i: i[1].get('used', 0))[-self.max_entries:] if self.max_entries > 0 else []
+        self.entries = dict(keep)
+        self.dirty = True
@@ -0,0 +1,184 @@
+"""
+the download queue, fetching songs from urls and converting them with ffmpeg
+"""
+import os
+import queue
+import urllib.parse
+from threading import Lock, Event
+from concurrent.futures import ThreadPoolExecutor
+
+from .util import audio_formats, video_formats, parse_args, run_ffmpeg
+
+
+class DownloadJob:
+    """
+    a queued download, carrying its own copy of the download dialog's parameters along with its status and progress
+    """
+    def __init__(self, params):
+        self.params = dict(params)
+        self.name = self.params['name']
+        self.status = 'queued'  # queued, downloading, converting, done, failed or cancelled
+        self.received = 0
+        self.progress = None  # fraction of the file received, None while the size is unknown
+        self.path = None  # the converted song once done
+        self.cancelled = Event()
+
+    def cancel(self):
+        self.cancelled.set()
+        if self.status == 'queued':
+            self.status = 'cancelled'
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'failed', 'cancelled')
+
+
+class DownloadManager:
+    """
+    runs download jobs on a bounded worker pool, queueing finished ones up for the GUI thread to add to the playlist
+    """
+    chunk_size = 1 << 16
+    seekable_formats = ['mp4', 'mov', '3gp']  # containers that may keep their index at the end, which ffmpeg cannot read from a pipe
+
+    def __init__(self, download_dir, song_dir, workers=2):
+        self.download_dir = download_dir
+        self.song_dir = song_dir
+        self.pool = ThreadPoolExecutor(workers)
+        self.jobs = []
+        self.results = queue.Queue()
+        self.you_get_lock = Lock()  # you-get keeps its options in module globals, so only one job may run it at a time
+
+    def submit(self, params):
+        job = DownloadJob(params)
+        self.jobs.append(job)
+        self.pool.submit(self.run, job)
+        return job
+
+    @property
+    def active(self):
+        return any(not job.finished for job in self.jobs)
+
+    def cancel(self):
+        for job in self.jobs:
+            job.cancel()
+
+    def clear_finished(self):
+        self.jobs = [job for job in self.jobs if not job.finished]
+
+    def shutdown(self):
+        self.cancel()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def url_format(url):
+        return urllib.parse.urlsplit(url).path.split('.')[-1].lower()
+
+    def is_direct(self, url):
+        """
+        whether url points straight at a media file that can be fetched over HTTP without you-get
+        """
+        return urllib.parse.urlsplit(url).scheme in ('http', 'https') and self.url_format(url) in video_formats + audio_formats
+
+    def can_stream(self, job):
+        return job.params.get('stream') == 'True' and self.is_direct(job.params['url']) and self.url_format(job.params['url']) not in self.seekable_formats
+
+    def run(self, job):
+        if job.cancelled.is_set():
+            job.status = 'cancelled'
+            self.results.put(job)
+            return
+        try:
+            if self.can_stream(job):
+                job.status = 'streaming'
+                job.path = self.stream(job)
+                job.status = 'cancelled' if job.cancelled.is_set() else 'done'
+                self.results.put(job)
+                return
+            job.status = 'downloading'
+            video = self.fetch(job) if self.is_direct(job.params['url']) else self.you_get(job)
+            if job.cancelled.is_set():
+                job.status = 'cancelled'
+            elif video is None:
+                print(f"ERROR: Download failed on URL: {job.params['url']}")
+                job.status = 'failed'
+            else:
+                job.status = 'converting'
+                job.path = self.convert(job, video)
+                job.status = 'cancelled' if job.cancelled.is_set() else 'done'
+        except (Exception, SystemExit) as e:  # you-get exits on errors
+            print(f"ERROR: Download failed on URL: {job.params['url']}: {e}")
+            job.status = 'failed'
+        self.results.put(job)
+
+    def fetch(self, job):
+        url = job.params['url']
+        path = f"{self.download_dir}{job.name}.{self.url_format(url)}"
+        import urllib.request  # slow to load, so only imported once something is downloaded
+        done = False
+        try:
+            with urllib.request.urlopen(url, timeout=30) as response, open(path, 'wb') as f:
+                for chunk in self.chunks(job, response):
+                    if job.cancelled.is_set():
+                        break
+                    f.write(chunk)
+            done = not job.cancelled.is_set()
+        finally:
+            if not done and os.path.exists(path):  # cancelled, or the connection dropped halfway
+                os.remove(path)
+        return path if done else None
+
+    def you_get(self, job):
+        from you_get import common as you_get_common  # loaded on the first download, keeping it off the startup path
+        yargs = [job.params['url']] + (parse_args(job.params['yargs']) if job.params['yargs'] else [])
+        yargs.extend(['-o', self.download_dir, '-O', job.name])
+        with self.you_get_lock:
+            if job.cancelled.is_set():
+                return None
+            you_get_common.main(yargs=yargs)
+        for ftype in video_formats + audio_formats:  # you-get saves to the name it was given, so only the extension is unknown
+            if os.path.exists(f'{self.download_dir}{job.name}.{ftype}'):
+                return f'{self.download_dir}{job.name}.{ftype}'
+        return None
+
+    def ffmpeg_args(self, job, source):
+        """
+        the ffmpeg arguments converting source into the job's song, trimmed to its start and end
+        """
+        args = parse_args(job.params['fiargs'])
+        if job.params['start']:
+            args += ['-ss', job.params['start']]
+        if job.params['end']:
+            args += ['-to', job.params['end']]
+        return args + ['-i', source] + parse_args(job.params['foargs']) + [f"{self.song_dir}{job.name}.{job.params['ftype']}"]
+
+    def transcode(self, job, args, chunks=None):
+        done = False
+        try:
+            done = run_ffmpeg(args, job.cancelled, chunks)
+        finally:
+            if not done and os.path.exists(args[-1]):  # never leave a truncated song behind, whatever stopped ffmpeg
+                os.remove(args[-1])
+        return args[-1] if done else None
+
+    def chunks(self, job, response):
+        size = int(response.headers.get('Content-Length') or 0)
+        while chunk := response.read(self.chunk_size):
+            job.received += len(chunk)
+            job.progress = job.received / size if size else None
+            yield chunk
+        if size and job.received < size and not job.cancelled.is_set():  # read(amt) takes a dropped connection for the end
+            raise ConnectionError(f'Connection closed after {job.received} of {size} bytes')
+
+    def stream(self, job):
+        """
+        pipes the download straight into ffmpeg, so nothing is written to the download directory and trimming starts with the first bytes
+        """
+        import urllib.request
+        with urllib.request.urlopen(job.params['url'], timeout=30) as response:
+            return self.transcode(job, self.ffmpeg_args(job, 'pipe:0'), self.chunks(job, response))
+
+    def convert(self, job, video):
+        song = self.transcode(job, self.ffmpeg_args(job, video))
+        if job.params['deletevid'] == 'True':
+            os.remove(video)
+        return song
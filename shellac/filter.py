@@ -0,0 +1,243 @@
+"""
+song filters and the tag bitmaps used to evaluate them quickly
+"""
+import re
+
+import numpy as np
+
+
+class Filter:
+    def __init__(self, regex='', tags=(), strict=True):
+        self.strict = strict
+        self.regex = regex
+        self.tags = [list(i) for i in tags]
+
+    @property
+    def tags_enabled(self):
+        return len(self.tags) != 0
+
+    @property
+    def regex_enabled(self):
+        return self.regex != ''
+
+    def check(self, song):
+        regex_result = re.search(self.regex, song.name) is not None if self.regex_enabled else True
+        if self.tags_enabled:
+            tags_result = False
+            for i in self.tags:
+                check = True
+                for j in i:
+                    if j[0] not in song.tags and j[1] or \
+                        j[0] in song.tags and not j[1]:
+                        check = False
+                if check:
+                    tags_result = True
+        else:
+            tags_result = True
+
+        if not self.regex_enabled and not self.tags_enabled:
+            return True
+        if not self.regex_enabled:
+            return tags_result
+        if not self.tags_enabled:
+            return regex_result
+
+        if self.strict:
+            return regex_result and tags_result
+        else:
+            return regex_result or tags_result
+
+    def compile(self):
+        return FilterPlan(self)
+
+
+class Bitmap:
+    """
+    compressed bitmap of row numbers: only the non-empty 4096-bit chunks are stored, each as a python int
+    """
+    SHIFT = 12
+    MASK = (1 << SHIFT) - 1
+
+    def __init__(self, chunks=None):
+        self.chunks = {} if chunks is None else chunks
+
+    def add(self, i):
+        k = i >> self.SHIFT
+        self.chunks[k] = self.chunks.get(k, 0) | 1 << (i & self.MASK)
+
+    def update(self, rows):
+        """
+        adds many rows at once, packing each chunk with numpy instead of setting bits one by one
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) < 64:
+            for i in rows.tolist():
+                self.add(i)
+            return
+        keys = rows >> self.SHIFT
+        width = 1 << self.SHIFT
+        for k in np.unique(keys).tolist():
+            bits = np.zeros(width, dtype=bool)
+            bits[rows[keys == k] & self.MASK] = True
+            self.chunks[k] = self.chunks.get(k, 0) | int.from_bytes(np.packbits(bits, bitorder='little').tobytes(), 'little')
+
+    def discard(self, i):
+        k = i >> self.SHIFT
+        chunk = self.chunks.get(k, 0) & ~(1 << (i & self.MASK))
+        if chunk:
+            self.chunks[k] = chunk
+        else:
+            self.chunks.pop(k, None)
+
+    def __contains__(self, i):
+        return self.chunks.get(i >> self.SHIFT, 0) >> (i & self.MASK) & 1 == 1
+
+    def __len__(self):
+        return sum(chunk.bit_count() for chunk in self.chunks.values())
+
+    def __bool__(self):
+        return bool(self.chunks)
+
+    def __and__(self, other):
+        a, b = (self.chunks, other.chunks) if len(self.chunks) <= len(other.chunks) else (other.chunks, self.chunks)
+        return Bitmap({k: a[k] & b[k] for k in a if k in b and a[k] & b[k]})
+
+    def __or__(self, other):
+        chunks = dict(self.chunks)
+        for k, chunk in other.chunks.items():
+            chunks[k] = chunks.get(k, 0) | chunk
+        return Bitmap(chunks)
+
+    def __sub__(self, other):
+        return Bitmap({k: chunk & ~other.chunks.get(k, 0) for k, chunk in self.chunks.items() if chunk & ~other.chunks.get(k, 0)})
+
+    def __iter__(self):
+        for k in sorted(self.chunks):
+            chunk = self.chunks[k]
+            while chunk:
+                low = chunk & -chunk
+                yield (k << self.SHIFT) + low.bit_length() - 1
+                chunk ^= low
+
+    def to_mask(self, size):
+        """
+        the bitmap as a boolean array over rows [0, size)
+        """
+        mask = np.zeros(size, dtype=bool)
+        width = 1 << self.SHIFT
+        for k, chunk in self.chunks.items():
+            start = k << self.SHIFT
+            if start >= size:
+                continue
+            bits = np.unpackbits(np.frombuffer(chunk.to_bytes(width // 8, 'little'), dtype=np.uint8), bitorder='little')
+            end = min(start + width, size)
+            mask[start:end] = bits[:end - start]
+        return mask
+
+
+class TagIndex:
+    """
+    inverted index from interned tag ids to bitmaps of the rows carrying each tag, maintained incrementally as rows change
+    """
+    def __init__(self, songs=()):
+        self.ids = {}  # tag -> id
+        self.names = []  # id -> tag
+        self.bitmaps = []  # id -> Bitmap of rows
+        self.all = Bitmap()
+        self.extend((row, song.tags) for row, song in enumerate(songs) if song is not None)
+
+    def intern(self, tag):
+        i = self.ids.get(tag)
+        if i is None:
+            i = self.ids[tag] = len(self.names)
+            self.names.append(tag)
+            self.bitmaps.append(Bitmap())
+        return i
+
+    def add(self, row, tags):
+        self.all.add(row)
+        for tag in tags:
+            self.bitmaps[self.intern(tag)].add(row)
+
+    def extend(self, rows):
+        """
+        adds many (row, tags) pairs at once
+        """
+        everything = []
+        tagged = {}
+        for row, tags in rows:
+            everything.append(row)
+            for tag in tags:
+                tagged.setdefault(self.intern(tag), []).append(row)
+        self.all.update(everything)
+        for i, tag_rows in tagged.items():
+            self.bitmaps[i].update(tag_rows)
+
+    def remove(self, row, tags):
+        self.all.discard(row)
+        for tag in tags:
+            if tag in self.ids:
+                self.bitmaps[self.ids[tag]].discard(row)
+
+    def bitmap(self, tag):
+        i = self.ids.get(tag)
+        return Bitmap() if i is None else self.bitmaps[i]
+
+    def count(self, tag):
+        return len(self.bitmap(tag))
+
+    @property
+    def tags(self):
+        return [tag for tag, bitmap in zip(self.names, self.bitmaps) if bitmap]
+
+    def match(self, rules):
+        """
+        the rows passing an OR of AND-ed (tag, positive) rules, as Filter.check evaluates them
+        """
+        result = Bitmap()
+        for rule in rules:
+            check = self.all
+            for tag, positive in rule:
+                check = check & self.bitmap(tag) if positive else check - self.bitmap(tag)
+            result = result | check
+        return result
+
+
+class FilterPlan:
+    """
+    a Filter compiled for whole-playlist evaluation: the regex is precompiled, and the tag rules run as bitmap operations on a TagIndex
+    """
+    def __init__(self, filter):
+        self.strict = filter.strict
+        self.regex = re.compile(filter.regex) if filter.regex_enabled else None
+        self.rules = [[(tag, positive) for tag, positive in rule] for rule in filter.tags] if filter.tags_enabled else None
+
+    def evaluate(self, songs, index=None):
+        """
+        returns a boolean array telling which of songs pass the filter, exactly as Filter.check would; None entries are skipped
+        """
+        size = len(songs)
+        if self.regex is None and self.rules is None:
+            return np.ones(size, dtype=bool)
+        tags_result = None
+        if self.rules is not None:
+            index = TagIndex(songs) if index is None else index
+            tags_result = index.match(self.rules).to_mask(size)
+            if self.regex is None:
+                return tags_result
+        # the regex can't be vectorised, so it only runs on the songs whose result it can still change
+        if tags_result is None:
+            candidates = range(size)
+        elif self.strict:
+            candidates = np.flatnonzero(tags_result).tolist()
+        else:
+            candidates = np.flatnonzero(~tags_result).tolist()
+        search = self.regex.search
+        regex_result = np.zeros(size, dtype=bool)
+        regex_result[[i for i in candidates if songs[i] is not None and search(songs[i].name) is not None]] = True
+        if tags_result is None:
+            return regex_result
+        if self.strict:
+            return regex_result & tags_result
+        else:
+            return regex_result | tags_result
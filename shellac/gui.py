@@ -0,0 +1,1728 @@
+"""
+the Qt user interface
+"""
+import os
+import sys
+import time
+import queue
+
+from PyQt6.QtCore import QRect, Qt, QMetaObject, QModelIndex, QSize, QItemSelection, QItemSelectionModel, QUrl, QStandardPaths, QEvent, QTimer
+from PyQt6.QtMultimedia import QMediaPlayer, QMediaDevices
+from PyQt6.QtGui import QAction, QActionGroup, QIcon, QFontMetrics, QPainter, QPixmap, QPalette
+from PyQt6.QtWidgets import QApplication, QMainWindow, QSlider, QMenu, QFileDialog, QTableView, QPushButton, \
+    QWidget, QLabel, QDialog, QTextEdit, QDialogButtonBox, QSpinBox, QCheckBox, QTreeWidget, QTreeWidgetItem, \
+    QAbstractItemView, QComboBox, QTableWidget, QTableWidgetItem, QInputDialog
+import numpy as np
+
+from .util import audio_formats, format_slp_line, std_time
+from .cache import MetadataCache
+from .filter import Filter
+from .song import Song
+from .playlist import Playlist
+from .index import ContentIndex
+from .analysis import WaveformCache, LoudnessAnalyzer
+from .importer import FolderImporter, PlaylistLoader, LibraryLoader
+from .library import Library
+from .download import DownloadManager
+from .transcode import BatchTranscoder
+from .playback import Playback
+from .model import PlaylistModel
+from .theme import apply_theme
+from .instrument import instruments
+
+
+class VersionPopup(QMainWindow):
+    def __init__(self):
+        super().__init__()
+        self.root = QWidget(self)
+        self.layout().addWidget(self.root)
+        self.setWindowModality(Qt.WindowModality.NonModal)
+        self.resize(600, 300)
+        self.test = QLabel("TEST", self.root)
+        self.logo = QLabel(self.root)
+        self.logo_pixmap = QPixmap("assets/shellac_banner.jpg")
+        self.logo.setPixmap(self.logo_pixmap)
+        self.logo.setGeometry(0, 0, 600, 300)
+
+
+class RollingLabel(QLabel):
+    def __init__(self, parent, flags):
+        super().__init__(parent, flags)
+        self.timerID = -1
+        self.time = 0
+        self.shift = -25
+        self.setAlignment(Qt.AlignmentFlag.AlignLeft)
+
+    @property
+    def text_width(self):
+        return QFontMetrics(self.font()).size(Qt.TextFlag.TextSingleLine, self.text()).width()
+
+    @property
+    def is_rolling(self):
+        return self.timerID >= 0
+
+    def update_rolling_state(self):
+        self.shift = -25
+        if self.text_width > self.width():
+            self.timerID = self.startTimer(20)
+        else:
+            if self.timerID >= 0:
+                self.killTimer(self.timerID)
+                self.timerID = -1
+
+    def timerEvent(self, a0):
+        self.shift += 1
+        if self.text_width - self.width() > self.shift:
+            self.shift = -25
+        self.repaint()
+
+    def paintEvent(self, a0):
+        if not self.is_rolling:
+            super().paintEvent(a0)
+            return
+
+        if self.shift > self.text_width:
+            self.shift = -20
+
+        shift = self.shift if self.shift > 0 else 0
+
+        pen = QPainter(self)
+        rc = self.rect()
+        text = self.text() + ' ' + self.text()
+        rc.setLeft(rc.left() - shift)
+        pen.drawText(rc, Qt.AlignmentFlag.AlignLeft, text)
+
+    def setText(self, a0):
+        super().setText(a0)
+        self.update_rolling_state()
+
+    def resize(self, a0):
+        super().resize(a0)
+        self.update_rolling_state()
+
+
+class WaveformSlider(QSlider):
+    """
+    seek bar drawing the peaks of the current track behind its handle, the played part in the highlight colour
+    """
+    def __init__(self, orientation, parent=None):
+        super().__init__(orientation, parent)
+        self.peaks = None  # bins -> peaks, as made by waveform_peaks
+        self.pixmaps = None  # (unplayed, played) renderings for the current size
+
+    def set_peaks(self, peaks):
+        self.peaks = peaks
+        self.pixmaps = None
+        self.update()
+
+    def resizeEvent(self, a0):
+        super().resizeEvent(a0)
+        self.pixmaps = None
+
+    def render_peaks(self):
+        width, height = self.width(), self.height()
+        levels = sorted(self.peaks)
+        peaks = self.peaks[next((i for i in levels if i >= width), levels[-1])]
+        peaks = np.maximum.reduceat(peaks, (np.arange(width) * len(peaks)) // width)  # one bar per pixel
+        heights = np.maximum(1, peaks.astype(np.int32) * height // max(1, int(peaks.max()))).tolist()  # scaled to the loudest peak
+        pixmaps = []
+        for role in (QPalette.ColorRole.Mid, QPalette.ColorRole.Highlight):
+            pixmap = QPixmap(width, height)
+            pixmap.fill(Qt.GlobalColor.transparent)
+            painter = QPainter(pixmap)
+            painter.setPen(self.palette().color(role))
+            for x, h in enumerate(heights):
+                painter.drawLine(x, (height - h) // 2, x, (height + h) // 2)
+            painter.end()
+            pixmaps.append(pixmap)
+        return pixmaps
+
+    def paintEvent(self, ev):
+        if self.peaks is not None and self.width() > 0:
+            if self.pixmaps is None:
+                self.pixmaps = self.render_peaks()
+            played = self.width() * (self.value() - self.minimum()) // max(1, self.maximum() - self.minimum())
+            painter = QPainter(self)
+            painter.drawPixmap(0, 0, self.pixmaps[0])
+            painter.drawPixmap(0, 0, self.pixmaps[1], 0, 0, played, self.height())
+            painter.end()
+        super().paintEvent(ev)
+
+
+class FilterDialog(QDialog):
+    def __init__(self, parent=None, filter=None):
+        super().__init__(parent)
+        self.initUI()
+        self.row_height = 25
+        if filter is not None:
+            self.strict_checkbox.setChecked(filter.strict)
+            self.regex_input.setText(filter.regex)
+            filter = filter.tags
+            for i in range(len(filter)):
+                self.add_rule()
+            for i, rule in enumerate(filter):
+                self.tags_frame.setCurrentItem(self.tags_frame.topLevelItem(i))
+                for j in range(len(rule)-1):
+                    self.add_tag()
+                for j, tag in enumerate(rule):
+                    self.tags_frame.topLevelItem(i).child(j).setText(0, ('' if tag[1] else 'NOT ')+'"'+tag[0]+'"')
+        self.update_text()
+
+    def initUI(self):
+        self.resize(500, 720)
+        self.root = QWidget(self)
+
+        self.regex_label = QLabel("Regular Expression", self.root)
+        self.regex_label.setAlignment(Qt.AlignmentFlag.AlignLeft)
+        self.regex_label.setGeometry(10, 10, 480, 20)
+
+        self.regex_input = QTextEdit(self.root)
+        self.regex_input.setGeometry(10, 30, 480, 40)
+        self.regex_input.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+
+        self.strict_checkbox = QCheckBox("Strict mode: regex AND tags", self.root)
+        self.strict_checkbox.setGeometry(10, 80, 480, 20)
+
+        self.tags_frame = QTreeWidget(self.root)
+        self.tags_frame.setGeometry(0, 170, 500, 400)
+        self.tags_frame.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.tags_frame.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+        self.tags_frame.setHeaderLabel("tags")
+        self.add_rule_button = QPushButton("Add Rule", self.root)
+        self.add_rule_button.setGeometry(10, 130, 100, 30)
+        self.add_rule_button.clicked.connect(self.add_rule)
+        self.add_rule_button.setShortcut('Ctrl+R')
+        self.add_tag_button = QPushButton("Add Tag", self.root)
+        self.add_tag_button.setGeometry(120, 130, 100, 30)
+        self.add_tag_button.clicked.connect(self.add_tag)
+        self.add_tag_button.setShortcut('Ctrl+T')
+        self.delete_button = QPushButton("Delete", self.root)
+        self.delete_button.setGeometry(230, 130, 100, 30)
+        self.delete_button.clicked.connect(self.delete)
+        self.delete_button.setShortcut('Ctrl+Delete')
+
+        self.tag_edit = QTextEdit(self.root)
+        self.tag_edit.setGeometry(10, 580, 380, 40)
+        self.tag_edit.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.set_tag_button = QPushButton("Set Tag", self.root)
+        self.set_tag_button.setGeometry(400, 580, 90, 40)
+        self.set_tag_button.clicked.connect(self.set_tag)
+        self.set_tag_button.setShortcut('Ctrl+E')
+        self.negated_checkbox = QCheckBox("Negate", self.root)
+        self.negated_checkbox.setGeometry(10, 620, 100, 25)
+        _button1 = QPushButton(self.root)
+        _button1.setMaximumWidth(0)
+        _button1.clicked.connect(self.down)
+        _button1.setShortcut('Ctrl+Down')
+        _button2 = QPushButton(self.root)
+        _button2.setMaximumWidth(0)
+        _button2.clicked.connect(self.up)
+        _button2.setShortcut('Ctrl+Up')
+        _button3 = QPushButton(self.root)
+        _button3.setMaximumWidth(0)
+        _button3.clicked.connect(self.negate)
+        _button3.setShortcut('Ctrl+N')
+
+        self.buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Cancel|QDialogButtonBox.StandardButton.Ok, self.root)
+        self.buttons.setGeometry(0, 660, 160, 60)
+        self.buttons.accepted.connect(self.accept)
+        self.buttons.rejected.connect(self.reject)
+
+    def down(self):
+        self.tags_frame.setCurrentItem(self.tags_frame.itemBelow(self.tags_frame.currentItem()))
+
+    def up(self):
+        self.tags_frame.setCurrentItem(self.tags_frame.itemAbove(self.tags_frame.currentItem()))
+
+    def negate(self):
+        self.negated_checkbox.setChecked(not self.negated_checkbox.isChecked())
+
+    def delete(self):
+        curr = self.tags_frame.currentItem()
+        if curr is None:
+            return 1
+        if curr.parent() is None:
+            self.tags_frame.takeTopLevelItem(self.tags_frame.indexOfTopLevelItem(curr))
+        else:
+            parent = curr.parent()
+            parent.takeChild(parent.indexOfChild(curr))
+            if parent.childCount() == 0:
+                self.tags_frame.takeTopLevelItem(self.tags_frame.indexOfTopLevelItem(parent))
+        self.update_text()
+
+    def update_text(self):
+        final_text = []
+        for a in range(self.tags_frame.topLevelItemCount()):
+            i = self.tags_frame.topLevelItem(a)
+            suite_text = []
+            for b in range(i.childCount()):
+                j = i.child(b)
+                if j.text(0):
+                    suite_text.append(j.text(0))
+            suite_text = ' AND '.join(suite_text)
+            i.setText(0, suite_text)
+            if suite_text:
+                final_text.append(suite_text)
+        final_text = ' OR '.join(final_text)
+        self.tags_frame.setHeaderLabel(final_text)
+
+    def set_tag(self):
+        curr = self.tags_frame.currentItem()
+        if curr is None:
+            return
+        if curr.parent() is None:
+            curr = curr.child(0)
+        curr.setText(0, ("NOT " if self.negated_checkbox.isChecked() else "") + f'"{self.tag_edit.toPlainText()}"')
+        self.update_text()
+
+    def add_tag(self):
+        i = self.tags_frame.currentItem()
+        if i is None:
+            return
+        if i.parent() is None:
+            i = i.child(0)
+        item = QTreeWidgetItem(i.parent())
+        item.setSizeHint(0, QSize(self.width(), self.row_height))
+        self.tags_frame.setCurrentItem(item)
+
+    def add_rule(self):
+        item = QTreeWidgetItem()
+        enter = QTreeWidgetItem(item)
+        item.setSizeHint(0, QSize(self.width(), self.row_height))
+        enter.setSizeHint(0, QSize(self.width(), self.row_height))
+        self.tags_frame.addTopLevelItem(item)
+        item.setExpanded(True)
+        self.tags_frame.setCurrentItem(enter)
+
+    @property
+    def filter(self):
+        f = []
+        for a in range(self.tags_frame.topLevelItemCount()):
+            f.append([])
+            i = self.tags_frame.topLevelItem(a)
+            for b in range(i.childCount()):
+                j = i.child(b)
+                if j.text(0):
+                    negated = len(j.text(0)) > 4 and j.text(0)[:4] == 'NOT '
+                    f[a].append(('"'.join(j.text(0).split('"')[1:-1]), not negated))
+        return Filter(self.regex_input.toPlainText(), f, self.strict_checkbox.isChecked())
+
+
+class AddSongDialog(QDialog):
+    def __init__(self, parent, filepath):
+        super().__init__(parent)
+        self.setupUi()
+        self.name_input.setText('.'.join(filepath.replace('\\', '/').split('/')[-1].split('.')[:-1]))
+        self.weight_input.setValue(1)
+
+    def setupUi(self):
+        self.setObjectName("Dialog")
+        self.resize(400, 300)
+        self.buttonBox = QDialogButtonBox(self)
+        self.buttonBox.setGeometry(QRect(280, 20, 100, 241))
+        self.buttonBox.setOrientation(Qt.Orientation.Vertical)
+        self.buttonBox.setStandardButtons(QDialogButtonBox.StandardButton.Cancel|QDialogButtonBox.StandardButton.Ok)
+        self.buttonBox.setObjectName("buttonBox")
+        self.label = QLabel(self)
+        self.label.setGeometry(QRect(10, 10, 55, 16))
+        self.label.setObjectName("label")
+        self.name_input = QTextEdit(self)
+        self.name_input.setGeometry(QRect(10, 30, 221, 80))
+        self.name_input.setObjectName("textEdit")
+        self.tags_input = QTextEdit(self)
+        self.tags_input.setGeometry(QRect(10, 140, 221, 80))
+        self.tags_input.setObjectName("textEdit_2")
+        self.label_2 = QLabel(self)
+        self.label_2.setGeometry(QRect(10, 120, 271, 16))
+        self.label_2.setObjectName("label_2")
+        self.label_3 = QLabel(self)
+        self.label_3.setGeometry(QRect(10, 230, 55, 16))
+        self.label_3.setObjectName("label_3")
+        self.weight_input = QSpinBox(self)
+        self.weight_input.setGeometry(QRect(180, 230, 60, 22))
+        self.weight_input.setMinimum(1)
+        self.weight_input.setObjectName("spinBox")
+
+        self.label.setText("Name:")
+        self.label_2.setText("Tags (separated by \',\'):")
+        self.label_3.setText("Weight:")
+        self.buttonBox.accepted.connect(self.accept)
+        self.buttonBox.rejected.connect(self.reject)
+        QMetaObject.connectSlotsByName(self)
+
+
+class DownloadQueueDialog(QDialog):
+    """
+    lists the download jobs with their status and progress, letting them be cancelled
+    """
+    def __init__(self, parent, manager):
+        super().__init__(parent)
+        self.manager = manager
+        self.setWindowTitle('Downloads')
+        self.resize(600, 400)
+        self.table = QTableWidget(0, 3, self)
+        self.table.setGeometry(QRect(10, 10, 580, 330))
+        self.table.setHorizontalHeaderLabels(['Name', 'Status', 'Progress'])
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setColumnWidth(0, 300)
+        self.cancel_button = QPushButton('Cancel selected', self)
+        self.cancel_button.setGeometry(QRect(10, 350, 180, 40))
+        self.cancel_button.clicked.connect(self.cancel_selected)
+        self.cancel_all_button = QPushButton('Cancel all', self)
+        self.cancel_all_button.setGeometry(QRect(200, 350, 180, 40))
+        self.cancel_all_button.clicked.connect(self.manager.cancel)
+        self.clear_button = QPushButton('Clear finished', self)
+        self.clear_button.setGeometry(QRect(390, 350, 200, 40))
+        self.clear_button.clicked.connect(self.clear_finished)
+        self.refresh()
+
+    def refresh(self):
+        self.table.setRowCount(len(self.manager.jobs))
+        for row, job in enumerate(self.manager.jobs):
+            if job.progress is not None:
+                progress = f'{job.progress:.0%}'
+            else:
+                progress = f'{job.received / 1048576:.1f} MB' if job.received else ''
+            for column, text in enumerate([job.name, job.status, progress]):
+                item = self.table.item(row, column)
+                if item is None:
+                    self.table.setItem(row, column, QTableWidgetItem(text))
+                elif item.text() != text:
+                    item.setText(text)
+
+    def cancel_selected(self):
+        for row in {i.row() for i in self.table.selectedIndexes()}:
+            self.manager.jobs[row].cancel()
+        self.refresh()
+
+    def clear_finished(self):
+        self.manager.clear_finished()
+        self.refresh()
+
+
+class InstrumentationDialog(QDialog):
+    """
+    shows the timings of the hooked hot paths and the latest event loop stalls, letting them be recorded, reset and exported
+    """
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.setWindowTitle('Performance')
+        self.resize(800, 600)
+        self.table = QTableWidget(0, 6, self)
+        self.table.setGeometry(QRect(10, 10, 780, 290))
+        self.table.setHorizontalHeaderLabels(['Name', 'Calls', 'Total ms', 'Mean ms', 'p95 ms', 'Max ms'])
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setColumnWidth(0, 300)
+        self.stall_view = QTextEdit(self)
+        self.stall_view.setGeometry(QRect(10, 310, 780, 230))
+        self.stall_view.setReadOnly(True)
+        self.record_checkbox = QCheckBox('Record', self)
+        self.record_checkbox.setGeometry(QRect(10, 550, 140, 40))
+        self.record_checkbox.toggled.connect(parent.set_instrumented)
+        self.refresh_button = QPushButton('Refresh', self)
+        self.refresh_button.setGeometry(QRect(160, 550, 200, 40))
+        self.refresh_button.clicked.connect(self.refresh)
+        self.reset_button = QPushButton('Reset', self)
+        self.reset_button.setGeometry(QRect(370, 550, 200, 40))
+        self.reset_button.clicked.connect(self.reset)
+        self.export_button = QPushButton('Export', self)
+        self.export_button.setGeometry(QRect(580, 550, 210, 40))
+        self.export_button.clicked.connect(parent.export_instrumentation)
+        self.refresh()
+
+    def refresh(self):
+        self.record_checkbox.blockSignals(True)
+        self.record_checkbox.setChecked(instruments.enabled)
+        self.record_checkbox.blockSignals(False)
+        snapshot = instruments.snapshot()
+        rows = [[name, str(h['count']), f"{h['total_ms']:.1f}", f"{h['mean_ms']:.2f}", f"{h['p95_ms']:.2f}", f"{h['max_ms']:.1f}"]
+                for name, h in snapshot['histograms'].items()]
+        rows += [[name, str(n), '', '', '', ''] for name, n in snapshot['counters'].items()]
+        self.table.setRowCount(len(rows))
+        for row, texts in enumerate(rows):
+            for column, text in enumerate(texts):
+                self.table.setItem(row, column, QTableWidgetItem(text))
+        self.stall_view.setPlainText('\n'.join(f"{stall['time']}: {stall.get('duration_ms', 0):.0f} ms\n" + ''.join(stall['stack'])
+                                                for stall in reversed(snapshot['stalls'])))
+
+    def reset(self):
+        instruments.reset()
+        self.refresh()
+
+
+class Player(QMainWindow):
+    def __init__(self):
+        super().__init__()
+        self.playing = None
+        self.loop_mode = 0
+        self.playlist = Playlist()
+        self.hist = []
+        self.hist_pointer = -1
+        self.volume = 1
+        self.playlist_literal = ''
+        self.player = Playback()
+        self.is_dragging = False
+        self.is_loading = False
+        self.download_timer = -1
+        self.download_view = None
+        self.instrument_view = None
+        self.heartbeat = None
+        self.transcoders = []
+        self.transcode_timer = -1
+        self.waveform_timer = -1
+        self.loudness_timer = -1
+        self.importers = []
+        self.import_timer = -1
+        self.shown_progress = None  # (position, duration) in whole seconds last drawn by refresh_progress
+        self.save_path = ''
+        self.drag = None
+        self.is_muted = False
+        self.next_to_play = None
+        self.player.connect('positionChanged', self.position_changed)
+        self.player.connect('durationChanged', self.refresh_progress)
+        self.player.connect('mediaStatusChanged', self.media_status_changed)
+        self.player.device_hooks.append(self.report_device_switch)
+        self.media_devices = QMediaDevices(self)
+        self.media_devices.audioOutputsChanged.connect(self.refresh_audio_device)
+        with open("config.txt") as config: # TODO more comprehensive loading and editing of config?
+            config = {j[0]: ':'.join(j[1:]) for j in [i[:-1].split(':') for i in config.readlines()]} # stupidass python which reads each line into dict form, key and value separated with the first ":" in a line
+            self.song_dir = config['songdir']
+            self.download_dir = config['downloaddir']
+            self.download_config = {j[0]: ':'.join(j[1:]) for j in [i.split(':') for i in config['downloadconfig'].split(';')]}
+            self.transcode_manifest = MetadataCache(config.get('transcodemanifest', './transcode.manifest'))
+            self.transcode_args = config.get('transcodeargs', '')
+            self.waveforms = WaveformCache(config.get('waveformcache', './waveforms/'), int(config.get('waveformcachesize', 1000)))
+            self.downloads = DownloadManager(self.download_dir, self.song_dir, int(config.get('downloadworkers', 2)))
+            self.file_folders = ['',
+                                 QStandardPaths.standardLocations(QStandardPaths.StandardLocation.DesktopLocation)[0],
+                                 QStandardPaths.standardLocations(QStandardPaths.StandardLocation.MusicLocation)[0],
+                                 self.song_dir
+            ]
+            self.file_folders.extend(config['folders'].split(';'))
+            self.loop_mode = int(config['loopmode'])
+            self.save_path = config['savedir']
+            self.player.crossfade = float(config.get('crossfade', 0))
+            self.audio_device = config.get('audiodevice', '')  # id of the chosen output device, empty to follow the system default
+            Song.cache = MetadataCache(config.get('metacache', './metadata.cache'), int(config.get('cachesize', 100000)))
+            ContentIndex.cache = MetadataCache(config.get('hashcache', './content.cache'), int(config.get('cachesize', 100000)))
+            self.normalize = float(config['normalize']) if config.get('normalize') else None  # target loudness in LUFS, None to leave volumes as they are
+            self.loudness = LoudnessAnalyzer(Song.cache)
+            self.instrument_file = config.get('instrumentfile', './instrument.json')
+            self.stall_threshold = float(config.get('stallthreshold', 100)) / 1000
+            instrumented = config.get('instrument') == 'True'
+        Song.cache.load()
+        ContentIndex.cache.load()
+        self.transcode_manifest.load()
+        if instrumented:
+            self.set_instrumented(True)
+        self.initUI()
+        self.refresh_audio_device()
+
+
+    def next(self):
+        if self.hist_pointer != -1:
+            assert self.hist_pointer < 0
+            self.hist_pointer += 1
+            self.playing = self.hist[self.hist_pointer]
+            self.play_song(self.playing, 0)
+            return
+        if len(self.playlist) == 0 or not self.playing or self.playing not in self.playlist:
+            return
+        if self.loop_mode == 0:
+            self.play(self.playing, 0)
+        elif self.loop_mode == 1:
+            self.play(0 if self.playing is self.playlist[-1] else self.playlist.get_row(self.playing) + 1)
+        elif self.loop_mode == 2:
+            self.play(self.next_to_play if self.next_to_play in self.playlist else self.playlist.random(self.playing)[1])
+        elif self.loop_mode == 3:
+            self.song_view.setText('Now Playing: ')
+            self.time_view.setText('--:--')
+            self.playing = None
+            self.player.clear()
+            return
+
+    def play(self, index, startpos=0):
+        if isinstance(index, QModelIndex):
+            self.list.setCurrentIndex(index)
+            index = index.row()
+        self.playing = self.playlist[index]
+        self.hist.append(self.playing)
+        self.play_song(index, startpos)
+
+    def play_song(self, song, pos=0):
+        self.song_view.setText('Now Playing: ' + self.playlist[song].name)
+        self.is_loading = True
+        self.shown_progress = None
+        self.show_waveform(self.playlist[song].path)
+        self.player.load(self.playlist[song].path)
+        self.player.set_gain(self.track_gain(self.playlist[song].path))
+        self.player.play()
+        self.player.seek(pos)
+        self.player.set_volume(2/3 * (0 if self.is_muted else self.volume))
+        self.is_loading = False
+        self.preload_next()
+
+    def show_waveform(self, path):
+        """
+        draws the cached peaks of path on the seek bar straight away, or has them computed and drawn once ready
+        """
+        peaks = self.waveforms.get(path)
+        self.progress_bar.set_peaks(peaks)
+        if peaks is None:
+            self.waveforms.request(path)
+            if self.waveform_timer < 0:
+                self.waveform_timer = self.startTimer(100)
+
+    def collect_waveforms(self):
+        while True:
+            try:
+                path, peaks = self.waveforms.results.get_nowait()
+            except queue.Empty:
+                break
+            if self.playing is not None and self.playing.path == path:
+                self.progress_bar.set_peaks(peaks)
+
+    def preload_next(self):
+        """
+        predicts the song next() will play, drawing it ahead of time in shuffle mode, and has the player buffer it
+        """
+        self.next_to_play = None
+        if self.hist_pointer != -1:
+            self.next_to_play = self.hist[self.hist_pointer + 1]
+        elif self.playing is not None and self.playing in self.playlist:
+            if self.loop_mode == 0:
+                self.next_to_play = self.playing
+            elif self.loop_mode == 1:
+                self.next_to_play = self.playlist[0 if self.playing is self.playlist[-1] else self.playlist.get_row(self.playing) + 1]
+            elif self.loop_mode == 2:
+                self.next_to_play = self.playlist.random(self.playing)[1]
+        self.player.preload(None if self.next_to_play is None else self.next_to_play.path)
+        if self.next_to_play is not None:
+            self.track_gain(self.next_to_play.path)  # has it measured before it starts playing
+
+    def track_gain(self, path):
+        """
+        the gain bringing path to the normalize target without clipping, or 1 until it has been measured in the background
+        """
+        if self.normalize is None:
+            return 1
+        measured = self.loudness.get(path)
+        if measured is None:
+            self.loudness.request(path)
+            if self.loudness_timer < 0:
+                self.loudness_timer = self.startTimer(200)
+            return 1
+        loudness, peak = measured
+        if loudness is None:
+            return 1
+        gain = 10 ** ((self.normalize - loudness) / 20)
+        return min(gain, 1 / peak) if peak else gain
+
+    def collect_loudness(self):
+        while True:
+            try:
+                path, loudness, peak = self.loudness.results.get_nowait()
+            except queue.Empty:
+                break
+            if self.playing is not None and self.playing.path == path:
+                self.player.set_gain(self.track_gain(path))
+
+
+    def last(self):
+        if -self.hist_pointer < len(self.hist):
+            self.hist_pointer -= 1
+            self.playing = self.hist[self.hist_pointer]
+            self.play_song(self.playing, 0)
+        else:
+            self.song_view.setText('Now Playing: ')
+            self.time_view.setText('--:--')
+            self.playing = None
+            self.player.clear()
+
+
+    def change_loop(self):
+        # 0: repeat; 1: loop; 2: shuffle play; 3: stop playing
+        self.loop_mode += 1
+        self.loop_mode %= 4
+        self.edit_config('loopmode', self.loop_mode)
+        if self.playing is not None:
+            self.preload_next()
+        self.refresh_loop_icon()
+
+    def refresh_loop_icon(self):
+        self.loop_button.setIcon(QIcon(f"assets/loop_{['repeat', 'list', 'shuffle', 'none'][self.loop_mode]}.png"))
+
+    def save(self):
+        if not self.window().isActiveWindow():
+            return
+        file, _ = self.file_dialog.getSaveFileName(self, directory=self.save_path, filter="Shellac Playlist Files(*.slp);;Shellac Library Files(*.sldb)", options=QFileDialog.Option.DontUseNativeDialog)
+        self.save_path = file
+        self.edit_config('savedir', file)
+        if not file:
+            return
+        if file.split('.')[-1] == 'sldb':
+            with Library(file) as library:
+                library.save(self.playlist)
+            return
+        with open(file, mode='w+') as f:
+            for i in self.playlist:
+                f.write(format_slp_line(i))
+
+    def load(self):
+        if not self.window().isActiveWindow():
+            return
+        file, _ = self.file_dialog.getOpenFileName(self, directory=self.save_path, filter="Shellac Playlist files(*.slp *.sldb)", options=QFileDialog.Option.DontUseNativeDialog)
+        if not file:
+            return
+        self.load_playlist(file)
+        self.save_path = file
+        self.edit_config('savedir', file)
+
+    def load_playlist(self, file):
+        loader = LibraryLoader(file) if file.split('.')[-1] == 'sldb' else PlaylistLoader(file)
+        self.importers.append(loader)
+        loader.start()
+        self.watch_imports()
+
+    def download(self):
+        dialog = QDialog()
+        dialog.resize(500, 780)
+        x = 10
+        y = 10
+        w = 480
+        url_l = QLabel('URL of video or audio:', dialog)
+        url_l.setGeometry(x, y, w, 20)
+        y += 20
+        url_t = QTextEdit(self.download_config['url'], dialog)
+        url_t.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        url_t.setGeometry(x, y, w, 40)
+        y += 50
+
+        name_l = QLabel('Name of song (Must be given):', dialog)
+        name_l.setGeometry(x, y, w, 20)
+        y += 20
+        name_t = QTextEdit(self.download_config.get('name', ''), dialog)
+        name_t.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        name_t.setGeometry(x, y, w, 40)
+        y += 50
+
+        start_l = QLabel('Starting Position (0:00 if left blank):', dialog)
+        start_l.setGeometry(x, y, w, 20)
+        y += 20
+        start_t = QTextEdit(self.download_config.get('start', ''), dialog)
+        start_t.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        start_t.setGeometry(x, y, w, 40)
+        y += 50
+
+        end_l = QLabel('Ending Position (end of file if left blank):', dialog)
+        end_l.setGeometry(x, y, w, 20)
+        y += 20
+        end_t = QTextEdit(self.download_config.get('end', ''), dialog)
+        end_t.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        end_t.setGeometry(x, y, w, 40)
+        y += 50
+
+        tags_l = QLabel('Tags:', dialog)
+        tags_l.setGeometry(x, y, w, 20)
+        y += 20
+        tags_t = QTextEdit(self.download_config['tags'], dialog)
+        tags_t.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        tags_t.setGeometry(x, y, w, 40)
+        y += 50
+
+        yargs_l = QLabel('Other you-get arguments:', dialog)
+        yargs_l.setGeometry(x, y, w, 20)
+        y += 20
+        yargs_t = QTextEdit(self.download_config['yargs'], dialog)
+        yargs_t.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        yargs_t.setGeometry(x, y, w, 40)
+        y += 50
+
+        fiargs_l = QLabel('Other ffmpeg arguments (input):', dialog)
+        fiargs_l.setGeometry(x, y, w, 20)
+        y += 20
+        fiargs_t = QTextEdit(self.download_config['fiargs'], dialog)
+        fiargs_t.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        fiargs_t.setGeometry(x, y, w, 40)
+        y += 50
+
+        foargs_l = QLabel('Other ffmpeg arguments (output):', dialog)
+        foargs_l.setGeometry(x, y, w, 20)
+        y += 20
+        foargs_t = QTextEdit(self.download_config['foargs'], dialog)
+        foargs_t.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        foargs_t.setGeometry(x, y, w, 40)
+        y += 50
+
+        filetype_l = QLabel('Filetype:', dialog)
+        filetype_l.setGeometry(x, y, w, 20)
+        y += 20
+        filetype_t = QComboBox(dialog)
+        filetype_t.addItems(audio_formats)
+        filetype_t.setCurrentIndex(audio_formats.index(self.download_config['ftype']))
+        filetype_t.setGeometry(x, y, w, 40)
+        y += 50
+
+        weight_l = QLabel('Weight:', dialog)
+        weight_l.setGeometry(x, y, w, 20)
+        y += 20
+        weight_t = QSpinBox(dialog)
+        weight_t.setValue(int(self.download_config['weight']))
+        weight_t.setGeometry(x, y, w, 40)
+        y += 50
+
+        save_box = QCheckBox("Save config", dialog)
+        save_box.setGeometry(x, y, 100, 30)
+        save_box.setChecked(True)
+        save_box.setCheckable(True)
+
+        delete_box = QCheckBox("Delete video file", dialog)
+        delete_box.setGeometry(x+125, y, 150, 30)
+        delete_box.setChecked(self.download_config['deletevid'] == 'True')
+        delete_box.setCheckable(True)
+
+        stream_box = QCheckBox("Convert while downloading", dialog)
+        stream_box.setGeometry(x, y+30, 250, 30)
+        stream_box.setChecked(self.download_config.get('stream', 'True') == 'True')
+        stream_box.setCheckable(True)
+
+        dialog.buttons = QDialogButtonBox(dialog)
+        dialog.buttons.setOrientation(Qt.Orientation.Horizontal)
+        dialog.buttons.setGeometry(x+300, y, w-300, 790-y)
+        dialog.buttons.setStandardButtons(QDialogButtonBox.StandardButton.Cancel | QDialogButtonBox.StandardButton.Ok)
+        dialog.buttons.accepted.connect(dialog.accept)
+        dialog.buttons.rejected.connect(dialog.reject)
+        dialog.setWindowTitle("Download")
+        dialog.exec()
+
+        if dialog.result() == 0:
+            return
+
+        name = name_t.toPlainText()
+        for char in [':', '*', '/', '\\', '<', '>', '|', '"', '?']:
+            name = name.replace(char, '')
+
+        params = {'url': url_t.toPlainText(),
+                              'start': start_t.toPlainText(),
+                              'end': end_t.toPlainText(),
+                              'name': name,
+                              'tags': tags_t.toPlainText(),
+                              'ftype': filetype_t.currentText(),
+                              'yargs': yargs_t.toPlainText().strip(),
+                              'fiargs': fiargs_t.toPlainText().strip(),
+                              'foargs': foargs_t.toPlainText(),
+                              'weight': weight_t.value(),
+                              'deletevid': str(delete_box.isChecked()),
+                              'stream': str(stream_box.isChecked())}
+        if save_box.isChecked():
+            self.download_config = params
+            self.save_download_config()
+
+        try:
+            if start_t.toPlainText():
+                int(start_t.toPlainText().split(':')[0])
+                int(start_t.toPlainText().split(':')[1])
+                assert len(start_t.toPlainText().split(':')) == 2
+        except:
+            print(f'ERROR: Invalid starting time received: {start_t.toPlainText()}')
+            return
+
+        try:
+            if end_t.toPlainText():
+                int(end_t.toPlainText().split(':')[0])
+                int(end_t.toPlainText().split(':')[1])
+                assert len(end_t.toPlainText().split(':')) == 2
+        except:
+            print(f'ERROR: Invalid ending time received: {end_t.toPlainText()}')
+            return
+        try:
+            assert len(name) >= 1
+        except:
+            print(f'ERROR: No name entered')
+            return
+
+        self.downloads.submit(params)
+        self.watch_downloads()
+
+    def watch_downloads(self):
+        if self.download_timer < 0:
+            self.download_timer = self.startTimer(200)
+
+    def collect_downloads(self):
+        while True:
+            try:
+                job = self.downloads.results.get_nowait()
+            except queue.Empty:
+                break
+            if job.status == 'done':
+                self.add(job.path, job.name, int(job.params['weight']), job.params['tags'].split(','))
+                self.statusBar().showMessage(f"Downloaded {job.name}", 5000)
+        if self.download_view is not None and self.download_view.isVisible():
+            self.download_view.refresh()
+
+    def ask_ftype(self):
+        ftype, ok = QInputDialog.getItem(self, 'Transcode', 'Convert to:', audio_formats, 0, False)
+        return ftype if ok else None
+
+    def transcode_selection(self):
+        if not self.window().isActiveWindow():
+            return
+        if self.playlist.is_empty_selection():
+            return
+        ftype = self.ask_ftype()
+        if ftype is None:
+            return
+        self.start_transcode([(song, song.path) for song in self.playlist.selected], ftype)
+
+    def transcode_folder(self):
+        if not self.window().isActiveWindow():
+            return
+        folder = self.file_dialog.getExistingDirectory(options=QFileDialog.Option.DontUseNativeDialog)
+        if not folder:
+            return
+        ftype = self.ask_ftype()
+        if ftype is None:
+            return
+        songs = {song.path: song for song in self.playlist.list}
+        sources = []
+        for root, dir, files in os.walk(folder):
+            for file in files:
+                if file.split('.')[-1] in audio_formats:
+                    path = os.path.join(root, file).replace('\\', '/')
+                    sources.append((songs.get(path), path))
+        self.start_transcode(sources, ftype)
+
+    def start_transcode(self, sources, ftype):
+        transcoder = BatchTranscoder(sources, ftype, self.transcode_manifest, self.transcode_args)
+        self.transcoders.append(transcoder)
+        transcoder.start()
+        if self.transcode_timer < 0:
+            self.transcode_timer = self.startTimer(200)
+
+    def collect_transcodes(self):
+        for transcoder in self.transcoders[:]:
+            finished = transcoder.finished
+            while True:
+                try:
+                    song, path = transcoder.results.get_nowait()
+                except queue.Empty:
+                    break
+                if song is not None and song.path != path:
+                    self.playlist.retarget(song, path)
+            if finished:
+                self.transcoders.remove(transcoder)
+                self.statusBar().showMessage(f"Transcoding {'cancelled' if transcoder.cancelled.is_set() else 'finished'}: {transcoder.converted} converted, "
+                                             f"{transcoder.skipped} up to date, {transcoder.failed} failed", 5000)
+            else:
+                self.statusBar().showMessage(f"Transcoding to {transcoder.ftype}: {transcoder.done}/{len(transcoder.sources)}")
+
+    def cancel_transcode(self):
+        for transcoder in self.transcoders:
+            transcoder.cancel()
+
+    def set_instrumented(self, on):
+        """
+        hooks the hot paths and starts watching the event loop for stalls, or puts everything back as it was
+        """
+        if self.heartbeat is not None:
+            self.heartbeat.stop()
+            self.heartbeat = None
+        if not on:
+            instruments.disable()
+            return
+        watchdog = instruments.enable(hot_paths, self.stall_threshold)
+        self.heartbeat = QTimer(self)  # beats outside timerEvent, which is itself one of the timed hot paths
+        self.heartbeat.timeout.connect(watchdog.beat)
+        self.heartbeat.start(int(watchdog.period * 1000))
+
+    def show_instrumentation(self):
+        if self.instrument_view is None:
+            self.instrument_view = InstrumentationDialog(self)
+        self.instrument_view.refresh()
+        self.instrument_view.show()
+
+    def export_instrumentation(self):
+        try:
+            instruments.export(self.instrument_file)
+            print(f'Performance statistics written to {self.instrument_file}')
+        except OSError as e:
+            print(f'ERROR: Could not write performance statistics to {self.instrument_file}: {e}')
+
+    def show_downloads(self):
+        if self.download_view is None:
+            self.download_view = DownloadQueueDialog(self, self.downloads)
+        self.download_view.refresh()
+        self.download_view.show()
+
+    def save_download_config(self):
+        self.edit_config('downloadconfig', ';'.join([f'{i}:{self.download_config[i]}' for i in self.download_config.keys()]))
+
+    def edit_config(self, key, value):
+        with open('config.txt', mode='r') as f:
+            data = f.readlines()
+        found = False
+        for i, line in enumerate(data):
+            if len(line) > 0 and line[:len(key)] == key:
+                data[i] = f'{key}:{value}\n'
+                found = True
+        if not found:
+            data.append(f'{key}:{value}\n')
+        with open('config.txt', mode='w+') as f:
+            f.writelines(data)
+
+    def add_song(self, path=None):
+        if not self.window().isActiveWindow():
+            return
+        if isinstance(path, str):
+            file = path
+        else:
+            file, _ = self.file_dialog.getOpenFileName(self, filter=f"Audio Files({';'.join([f'*.{i}' for i in audio_formats])})", directory=self.song_dir, options=QFileDialog.Option.DontUseNativeDialog)
+            if not file:
+                return
+        # orig_path = file
+        # file = self.song_dir + file.replace('\\', '/').split('/')[-1]
+        # try:
+        #     shutil.copy(orig_path, self.song_dir)
+        # except shutil.SameFileError:
+        #     pass
+        dialog = AddSongDialog(self, file)
+        dialog.exec()
+        if dialog.result() == 1:
+            self.add(file, dialog.name_input.toPlainText(), int(dialog.weight_input.text()), dialog.tags_input.toPlainText().split(', '))
+
+    def add(self, path, name=None, weight=1, tags=()):
+        self.add_songs([Song(path, name, weight, list(tags))])
+
+    def add_songs(self, songs):
+        self.playlist.extend(songs)
+
+
+    def add_folder(self):
+        if not self.window().isActiveWindow():
+            return
+        filepath = self.file_dialog.getExistingDirectory(options=QFileDialog.Option.DontUseNativeDialog)
+        self.load_folder(filepath)
+
+    def load_folder(self, filepath):
+        if not filepath:
+            return
+        importer = FolderImporter(filepath, existing=[song.path for song in self.playlist.list])
+        self.importers.append(importer)
+        importer.start()
+        self.watch_imports()
+
+    def watch_imports(self):
+        """
+        drains the importers' queues on a timer that only runs while something is being imported
+        """
+        if self.import_timer < 0:
+            self.import_timer = self.startTimer(50)
+
+    def collect_imports(self):
+        for importer in self.importers[:]:
+            finished = importer.finished
+            while True:
+                try:
+                    batch = importer.results.get_nowait()
+                except queue.Empty:
+                    break
+                if not isinstance(importer, PlaylistLoader):  # imported songs are distinct files, so clashing titles get numbered
+                    taken = set()
+                    for song in batch:
+                        song.name = self.playlist.unique_name(song.name, taken)
+                        taken.add(song.name)
+                self.add_songs(batch)
+            while isinstance(importer, PlaylistLoader):
+                try:
+                    self.fill_lengths(importer.updates.get_nowait())
+                except queue.Empty:
+                    break
+            if finished:
+                self.importers.remove(importer)
+                Song.cache.flush()
+                ContentIndex.cache.flush()
+                skipped = f", skipped {importer.duplicates} duplicates" if importer.duplicates else ''
+                self.statusBar().showMessage(f"{'Cancelled' if importer.cancelled.is_set() else 'Finished'} {importer.action} {importer.path}{skipped}", 5000)
+            else:
+                self.statusBar().showMessage(f"{importer.action.capitalize()} {importer.path}: {importer.probed}/{importer.found}")
+
+    def fill_lengths(self, batch):
+        """
+        applies durations probed by a PlaylistLoader, dropping the songs whose files have gone missing
+        """
+        for song, length in batch:
+            if self.playlist.get_index(song) is None:
+                continue
+            if length is None and not os.path.exists(song.path):
+                print(f'ERROR: {song.path} no longer exists, removing {song.name}')
+                if song is self.playing:
+                    self.player.stop()
+                self.playlist.delete(song)
+            elif length != song.length:
+                self.playlist.set_length(song, length)
+
+    def cancel_import(self):
+        for importer in self.importers:
+            importer.cancel()
+
+    def remove_song(self):
+        if not self.window().isActiveWindow():
+            return
+        if self.playlist.is_empty_selection():
+            return
+        if self.playing in self.playlist.selected:
+            self.player.stop()
+        self.playlist.delete(list(self.playlist.selected))
+
+    def deselect(self):
+        if not self.window().isActiveWindow():
+            return
+        self.playlist.clear_select()
+        self.refresh_selection_highlight()
+
+    def refresh_selection_highlight(self):
+        selection = QItemSelection()
+        for first, last in self.playlist.selected_ranges():
+            selection.select(self.model.index(first, 0, QModelIndex()), self.model.index(last, self.model.columnCount()-1, QModelIndex()))
+        self.list.selectionModel().select(selection, QItemSelectionModel.SelectionFlag.ClearAndSelect)
+
+    # def handle_keys(self, key_event):
+    #
+
+
+    def initUI(self):
+        self.setObjectName("MainWindow")
+        self.resize(1920, 1080)
+        self.centralwidget = QWidget(self)
+        self.centralwidget.setObjectName("centralwidget")
+        self.list = QTableView(self.centralwidget)
+        self.list.keyboardSearch = lambda x: None
+        self.list.setGeometry(QRect(20, 10, 1450, 660))
+        self.list.setObjectName("playlist")
+        self.list.horizontalHeader().setStretchLastSection(True)
+        self.list.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.list.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        button_ypos = 710
+        self.pause_button = QPushButton(self.centralwidget)
+        self.pause_button.setGeometry(QRect(72, button_ypos, 24, 24))
+        self.pause_button.setObjectName("pause_button")
+        self.pause_button.setIcon(QIcon("assets/pause.png"))
+        self.pause_button.setShortcut("Space")
+        self.last_button = QPushButton(self.centralwidget)
+        self.last_button.setGeometry(QRect(45, button_ypos, 24, 24))
+        self.last_button.setObjectName("last_button")
+        self.last_button.setIcon(QIcon("assets/last.png"))
+        self.last_button.setShortcut(Qt.Key.Key_BracketLeft)
+        self.next_button = QPushButton(self.centralwidget)
+        self.next_button.setGeometry(QRect(99, button_ypos, 24, 24))
+        self.next_button.setObjectName("next_button")
+        self.next_button.setIcon(QIcon("assets/next.png"))
+        self.next_button.setShortcut(Qt.Key.Key_BracketRight)
+        self.loop_button = QPushButton(self.centralwidget)
+        self.loop_button.setGeometry(QRect(135, button_ypos, 24, 24))
+        self.loop_button.setObjectName("loop_button")
+        self.loop_button.setShortcut('L')
+        self.refresh_loop_icon()
+        self.up_button = QPushButton(self.centralwidget)
+        self.up_button.setGeometry(QRect(600, button_ypos, 24, 24))
+        self.up_button.setObjectName("up_button")
+        self.up_button.setIcon(QIcon("assets/up.png"))
+        self.up_button.setShortcut(Qt.Key.Key_Up + Qt.Key.Key_Shift)
+
+        self.down_button = QPushButton(self.centralwidget)
+        self.down_button.setGeometry(QRect(635, button_ypos, 24, 24))
+        self.down_button.setObjectName("down_button")
+        self.down_button.setIcon(QIcon("assets/down.png"))
+        self.down_button.setShortcut(Qt.Key.Key_Down + Qt.Key.Key_Shift)
+        self.progress_bar = WaveformSlider(Qt.Orientation.Horizontal, self.centralwidget)
+        self.progress_bar.setGeometry(QRect(20, button_ypos-36, 1450, 32))
+        self.progress_bar.setObjectName("progress_bar")
+        self.volume_control = QSlider(Qt.Orientation.Horizontal, self.centralwidget)
+        self.volume_control.setGeometry(210, button_ypos, 120, 24)
+        self.volume_control.setObjectName("volume_control")
+        self.volume_control.setMaximum(150)
+        self.volume_control.setMinimum(0)
+        self.volume_control.setSingleStep(1)
+        self.volume_control.setValue(100)
+        self.mute_button = QPushButton(self.centralwidget)
+        self.mute_button.setGeometry(180, button_ypos, 24, 24)
+        self.mute_button.setIcon(QIcon('assets/volume_3.png'))
+        self.volume_view = QLabel('100', self.centralwidget)
+        self.volume_view.setGeometry(330, button_ypos + 5, 30, 16)
+        self.volume_view.setAlignment(Qt.AlignmentFlag.AlignRight)
+        self.time_view = QLabel('--:--', self.centralwidget)
+        self.time_view.setGeometry(QRect(360, button_ypos + 5, 200, 16))
+        self.time_view.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.time_view.setObjectName("time_view")
+        self.song_view = RollingLabel('Now Playing: ', self.centralwidget)
+        self.song_view.setGeometry(QRect(750, button_ypos + 5, 700, 16))
+        self.song_view.setObjectName("song_view")
+
+        self.setCentralWidget(self.centralwidget)
+        self.pause_button.clicked.connect(self.toggle_pause)
+        self.last_button.clicked.connect(self.last)
+        self.loop_button.clicked.connect(self.change_loop)
+        self.next_button.clicked.connect(self.next)
+        self.list.doubleClicked.connect(self.play_item)
+        self.list.clicked.connect(self.select)
+        self.up_button.clicked.connect(self.up_song)
+        self.down_button.clicked.connect(self.down_song)
+        QMetaObject.connectSlotsByName(self)
+        self.model = PlaylistModel(playlist=self.playlist)
+        self.list.setModel(self.model)
+        self.progress_bar.sliderPressed.connect(self.start_drag)
+        self.progress_bar.sliderReleased.connect(self.stop_drag)
+        self.progress_bar.valueChanged.connect(self.slider_changed)
+        self.mute_button.clicked.connect(self.toggle_mute)
+        self.volume_control.valueChanged.connect(self.change_volume)
+
+        # ----------------------------------- #
+
+        playmenu = QMenu('Play', self)
+        next_song = QAction('Next song', self)
+        next_song.setShortcut('Alt+N')
+        next_song.setStatusTip('Switches to next song, based on playlist and loop.')
+        next_song.triggered.connect(self.next)
+        playmenu.addAction(next_song)
+
+        last_song = QAction('Last song', self)
+        last_song.setShortcut('Alt+B')
+        last_song.setStatusTip('Switches to last song in history')
+        last_song.triggered.connect(self.last)
+        playmenu.addAction(last_song)
+
+        change_loop = QAction('Change loop', self)
+        change_loop.setShortcut('Alt+L')
+        change_loop.setStatusTip('Switches the loop type')
+        change_loop.triggered.connect(self.change_loop)
+        playmenu.addAction(change_loop)
+
+        select = QAction('Select', self)
+        select.setShortcut('Alt+P')
+        select.setStatusTip('Selects a file based on information')
+        select.triggered.connect(self.select)
+        playmenu.addAction(select)
+
+        deselect = QAction('Deselect', self)
+        deselect.setShortcut('Esc')
+        deselect.setStatusTip('Deselects the selection file')
+        deselect.triggered.connect(self.deselect)
+        playmenu.addAction(deselect)
+
+        toggle_mute = QAction('Mute/Unmute', self)
+        toggle_mute.setShortcut('Alt+M')
+        toggle_mute.setStatusTip('Toggles the mute state')
+        toggle_mute.triggered.connect(self.toggle_mute)
+        playmenu.addAction(toggle_mute)
+
+        self.device_menu = playmenu.addMenu('Audio device')
+        self.device_menu.setStatusTip('Chooses the device songs are played on')
+        self.device_menu.aboutToShow.connect(self.fill_device_menu)
+
+        # TODO complete this function: set the next song to play
+        # set_next = QAction('Set Next', self)
+        # set_next.triggered.connect(self.set_next)
+        # playmenu.addAction(set_next)
+
+        # =======
+
+        filemenu = QMenu('File', self)
+
+        save = QAction('Save', self)
+        save.setShortcut('Alt+S')
+        save.setStatusTip('Saves the current playlist')
+        save.triggered.connect(self.save)
+        filemenu.addAction(save)
+
+        load = QAction('Load', self)
+        load.setShortcut('Alt+O')
+        load.setStatusTip('Loads a playlist')
+        load.triggered.connect(self.load)
+        filemenu.addAction(load)
+
+        add = QAction('Add song', self)
+        add.setShortcut('Alt+A')
+        add.setStatusTip('Adds an audio file to the playlist')
+        add.triggered.connect(self.add_song)
+        filemenu.addAction(add)
+
+        add_folder = QAction('Add folder', self)
+        add_folder.setShortcut('Alt+Shift+O')
+        add_folder.setStatusTip('Adds a folder to the playlist')
+        add_folder.triggered.connect(self.add_folder)
+        filemenu.addAction(add_folder)
+
+        cancel_import = QAction('Cancel import', self)
+        cancel_import.setShortcut('Alt+Shift+C')
+        cancel_import.setStatusTip('Stops importing folders that are still being added')
+        cancel_import.triggered.connect(self.cancel_import)
+        filemenu.addAction(cancel_import)
+
+        delete = QAction('Delete song', self)
+        delete.setShortcut('Delete')
+        delete.setStatusTip('Deletes the selection song')
+        delete.triggered.connect(self.remove_song)
+        filemenu.addAction(delete)
+
+        clear = QAction('Clear', self)
+        clear.setShortcut('Alt+Shift+Delete')
+        clear.setStatusTip('Clears the current playlist')
+        clear.triggered.connect(self.clear)
+        filemenu.addAction(clear)
+
+        download = QAction('Download from internet', self)
+        download.setShortcut('Alt+Ctrl+D')
+        download.setStatusTip('Opens a dialog to download from an online source.')
+        download.triggered.connect(self.download)
+        filemenu.addAction(download)
+
+        downloads = QAction('Download queue', self)
+        downloads.setShortcut('Alt+Ctrl+Q')
+        downloads.setStatusTip('Shows the progress of downloads and lets them be cancelled')
+        downloads.triggered.connect(self.show_downloads)
+        filemenu.addAction(downloads)
+
+        transcode = QAction('Transcode selected', self)
+        transcode.setShortcut('Alt+T')
+        transcode.setStatusTip('Converts the selected songs to another format')
+        transcode.triggered.connect(self.transcode_selection)
+        filemenu.addAction(transcode)
+
+        transcode_folder = QAction('Transcode folder', self)
+        transcode_folder.setShortcut('Alt+Shift+T')
+        transcode_folder.setStatusTip('Converts every song in a folder to another format')
+        transcode_folder.triggered.connect(self.transcode_folder)
+        filemenu.addAction(transcode_folder)
+
+        cancel_transcode = QAction('Cancel transcoding', self)
+        cancel_transcode.setStatusTip('Stops the conversions still running')
+        cancel_transcode.triggered.connect(self.cancel_transcode)
+        filemenu.addAction(cancel_transcode)
+
+        # ==============
+
+        editmenu = QMenu('Edit', self)
+
+        edit = QAction('Edit Selected', self)
+        edit.setShortcut('Alt+E')
+        edit.setStatusTip('Edits data of the selection item')
+        edit.triggered.connect(self.edit)
+        editmenu.addAction(edit)
+
+        edit_filter = QAction('Add/Edit Filter', self)
+        edit_filter.setShortcut('Ctrl+F')
+        edit_filter.setStatusTip('Edits the filter put over the playlist')
+        edit_filter.triggered.connect(self.edit_filter)
+        editmenu.addAction(edit_filter)
+
+        clear_filter = QAction('Clear Filters', self)
+        clear_filter.setShortcut('Ctrl+Alt+R')
+        clear_filter.setStatusTip('Clears all filters')
+        clear_filter.triggered.connect(self.clear_filter)
+        editmenu.addAction(clear_filter)
+
+        performance = QAction('Performance stats', self)
+        performance.setShortcut('Ctrl+Alt+P')
+        performance.setStatusTip('Shows how long the hot paths take and where the interface stalled')
+        performance.triggered.connect(self.show_instrumentation)
+        editmenu.addAction(performance)
+
+        # version = QAction("Version", self)
+        # version.triggered.connect(self.show_version)
+
+       # ================
+
+        self.menu = self.menuBar()
+        self.menu.addMenu(playmenu)
+        self.menu.addMenu(filemenu)
+        self.menu.addMenu(editmenu)
+        # self.menu.addAction(version)
+
+        self.file_dialog = QFileDialog(self)
+        self.file_dialog.setWindowIcon(QIcon('assets/Shellac.ico'))
+        self.file_dialog.setViewMode(QFileDialog.ViewMode.List)
+        self.file_dialog.setOption(QFileDialog.Option.DontUseNativeDialog)
+        self.file_dialog.setSidebarUrls([
+            QUrl.fromLocalFile(os.path.expanduser(path.replace('./', os.getcwd()+'/').replace('\\', '/'))) for path in self.file_folders])
+
+        self.setWindowTitle('Shellac')
+        self.show()
+
+    def closeEvent(self, a0):
+        self.cancel_import()
+        self.cancel_transcode()
+        self.downloads.shutdown()
+        self.waveforms.shutdown()
+        self.loudness.shutdown()
+        if instruments.enabled:
+            self.export_instrumentation()
+            self.set_instrumented(False)
+        Song.cache.flush()
+        ContentIndex.cache.flush()
+        super().closeEvent(a0)
+
+    def show_version(self):
+        self.version_popup = VersionPopup()
+        self.version_popup.show()
+
+    def timerEvent(self, a0):
+        if a0.timerId() == self.import_timer:
+            self.collect_imports()
+            if not self.importers:
+                self.killTimer(self.import_timer)
+                self.import_timer = -1
+        elif a0.timerId() == self.waveform_timer:
+            self.collect_waveforms()
+            if not self.waveforms.pending and self.waveforms.results.empty():
+                self.killTimer(self.waveform_timer)
+                self.waveform_timer = -1
+        elif a0.timerId() == self.loudness_timer:
+            self.collect_loudness()
+            if not self.loudness.pending and self.loudness.results.empty():
+                self.killTimer(self.loudness_timer)
+                self.loudness_timer = -1
+        elif a0.timerId() == self.transcode_timer:
+            self.collect_transcodes()
+            if not self.transcoders:
+                self.killTimer(self.transcode_timer)
+                self.transcode_timer = -1
+        elif a0.timerId() == self.download_timer:
+            self.collect_downloads()
+            if not self.downloads.active and self.downloads.results.empty():
+                self.killTimer(self.download_timer)
+                self.download_timer = -1
+
+    def position_changed(self, position):
+        if self.player.in_crossfade:
+            self.next()
+        self.refresh_progress()
+
+    def refresh_audio_device(self):
+        """
+        follows the chosen output device, or the system default when none is chosen or it has been unplugged
+        """
+        device = QMediaDevices.defaultAudioOutput()
+        for output in QMediaDevices.audioOutputs():
+            if self.audio_device and bytes(output.id()).decode() == self.audio_device:
+                device = output
+        if device != self.player.audio_output.device():
+            self.player.set_device(device)
+
+    def choose_audio_device(self, device_id):
+        self.audio_device = device_id
+        self.edit_config('audiodevice', device_id)
+        self.refresh_audio_device()
+
+    def report_device_switch(self, device, elapsed):
+        self.statusBar().showMessage(f"Switched audio output to {device.description()} in {round(elapsed * 1000)} ms", 5000)
+
+    def fill_device_menu(self):
+        self.device_menu.clear()
+        group = QActionGroup(self.device_menu)
+        current = self.player.audio_output.device()
+        for name, device_id, device in [('System default', '', None)] + [(i.description(), bytes(i.id()).decode(), i) for i in QMediaDevices.audioOutputs()]:
+            action = QAction(name, self.device_menu)
+            action.setCheckable(True)
+            action.setChecked(device_id == self.audio_device and (not device_id or device == current))
+            action.triggered.connect(lambda _, i=device_id: self.choose_audio_device(i))
+            group.addAction(action)
+            self.device_menu.addAction(action)
+
+    def media_status_changed(self, status):
+        if status == QMediaPlayer.MediaStatus.EndOfMedia:
+            self.next()
+
+    def refresh_progress(self, *_):
+        """
+        redraws the progress bar and time label, at most once per second of playback and only while they can be seen
+        """
+        if self.playing is None:
+            if self.shown_progress is not None:
+                self.shown_progress = None
+                self.time_view.setText("--:--/--:--")
+                self.progress_bar.set_peaks(None)
+            return
+        if self.is_dragging or not self.isVisible() or self.isMinimized():
+            return
+        progress = round(self.player.curr_pos), round(self.player.duration)
+        if progress == self.shown_progress:
+            return
+        self.shown_progress = progress
+        current_time, total_time = progress
+        self.progress_bar.setMaximum(total_time)
+        self.progress_bar.setValue(current_time)
+        self.time_view.setText(f"{std_time(current_time)}/{std_time(total_time)}")
+
+    def showEvent(self, a0):
+        super().showEvent(a0)
+        self.refresh_progress()
+
+    def changeEvent(self, a0):
+        super().changeEvent(a0)
+        if a0.type() == QEvent.Type.WindowStateChange:
+            self.shown_progress = None
+            self.refresh_progress()
+
+    def edit_filter(self):
+        dialog = FilterDialog(self, self.playlist.filter)
+        dialog.exec()
+        if dialog.result() == 0:
+            return
+        self.set_filter(dialog.filter)
+
+    def clear_filter(self):
+        self.set_filter(Filter())
+
+    def set_filter(self, filter):
+        if self.playing is not None and not filter.check(self.playing):
+            self.player.stop()
+            self.playing = None
+        self.time_view.setText("--:--/--:--")
+        self.song_view.setText("Now Playing: ")
+        self.hist = []
+        self.hist_pointer = -1
+        self.playlist.set_filter(filter)
+
+    def play_item(self, item):
+        import keyboard
+        self.select(item)
+        if keyboard.is_pressed('ctrl'):
+            self.edit()
+            return
+        if self.hist_pointer < -1:
+            self.hist = self.hist[:self.hist_pointer]
+        self.hist_pointer = -1
+        self.play(item)
+        self.refresh_selection_highlight()
+        self.refresh_pause_icon()
+
+    def refresh_pause_icon(self):
+        if self.player and self.player.is_playing:
+            self.pause_button.setIcon(QIcon('assets/pause.png'))
+        else:
+            self.pause_button.setIcon(QIcon('assets/play.png'))
+
+    def start_drag(self):
+        self.is_dragging = True
+
+    def stop_drag(self):
+        self.is_dragging = False
+        if self.playing is not None:
+            self.player.seek(self.progress_bar.sliderPosition())
+
+    def slider_changed(self):
+        if self.is_dragging:
+            total_time = round(self.player.duration)
+            current_time = self.progress_bar.sliderPosition()
+            self.time_view.setText(
+                f"{std_time(current_time)}/{std_time(total_time)}")
+
+    def pause(self):
+        if self.player.is_playing:
+            self.player.pause()
+            self.refresh_pause_icon()
+
+    def unpause(self):
+        if self.player.is_paused:
+            self.player.resume()
+            self.refresh_pause_icon()
+
+    def toggle_pause(self):
+        if not self.player.is_valid:
+            return
+        if self.player.is_paused:
+            self.unpause()
+        elif self.player.is_playing:
+            self.pause()
+
+    def change_volume(self, v):
+        self.volume = v / 100
+        if self.player.is_valid:
+            self.player.set_volume(2/3 * (0 if self.is_muted else self.volume))
+        self.refresh_mute_icon()
+        self.volume_view.setText(str(v))
+
+    def toggle_mute(self):
+        self.is_muted = not self.is_muted
+        if self.player.is_valid:
+            self.player.set_volume(2/3 * (0 if self.is_muted else self.volume))
+        self.refresh_mute_icon()
+
+    def refresh_mute_icon(self):
+        if self.volume == 0:
+            self.mute_button.setIcon(QIcon('assets/volume_0.png'))
+        elif self.volume <= 0.5:
+            self.mute_button.setIcon(QIcon(f'assets/volume_1{"_mute" if self.is_muted else ""}'))
+        elif self.volume <= 1:
+            self.mute_button.setIcon(QIcon(f'assets/volume_2{"_mute" if self.is_muted else ""}'))
+        else:
+            self.mute_button.setIcon(QIcon(f'assets/volume_3{"_mute" if self.is_muted else ""}'))
+
+    def clear(self):
+        if not self.window().isActiveWindow():
+            return
+        if self.player.is_valid:
+            self.player.stop()
+        self.playlist = Playlist()
+        self.playlist.set_filter(Filter())
+        self.model.set_playlist(self.playlist)
+        self.song_view.setText("Now Playing:")
+
+    def up_song(self):
+        self.move_selection(-1)
+
+    def down_song(self):
+        self.move_selection(1)
+
+    def move_selection(self, direction):
+        if self.playlist.is_empty_selection():
+            return
+        import keyboard
+        k = 1
+        for n in range(1, 10):
+            if keyboard.is_pressed(str(n)):
+                k = n
+        if keyboard.is_pressed('alt'):
+            k = len(self.playlist)
+        self.playlist.move(self.playlist.selected, direction * k)
+        self.refresh_selection_highlight()
+
+    def select(self, i=None):
+        import keyboard
+        if not self.window().isActiveWindow():
+            return
+        if not isinstance(i, QModelIndex):
+            dialog = QDialog()
+            label = QLabel("Enter Name/Index (separated with ; if multiple):", dialog)
+            text = QTextEdit(dialog)
+            buttons = QDialogButtonBox(dialog)
+            buttons.setStandardButtons(QDialogButtonBox.StandardButton.Cancel | QDialogButtonBox.StandardButton.Ok)
+            buttons.accepted.connect(dialog.accept)
+            buttons.rejected.connect(dialog.reject)
+            dialog.setWindowTitle("Select Song")
+            dialog.resize(300, 180)
+            label.setGeometry(10, 10, 280, 30)
+            text.setGeometry(10, 40, 280, 50)
+            buttons.setGeometry(10, 100, 280, 80)
+            dialog.setWindowIcon(QIcon('assets/Shellac.ico'))
+            dialog.exec()
+            if dialog.result() == 1:
+                for i in text.toPlainText().split(';'):
+                    self.playlist.select(self.playlist.get_song(i))
+        else:
+            if not keyboard.is_pressed('shift'):
+                self.playlist.reselect(self.playlist[i.row()])
+            else:
+                self.playlist.toggle_select(self.playlist[i.row()])
+        self.refresh_selection_highlight()
+
+    def dragEnterEvent(self, a0):  # Haven't figured out how this works yet. Currently stub
+        self.drag = a0.mimeData().text()
+        a0.accept()
+
+    def dropEvent(self, a0):
+        if '.' not in self.drag.replace('\\', '/').split('/')[-1]:
+            self.load_folder(self.drag)
+            return
+        file_type = self.drag.split('.')[-1]
+        if file_type in ['slp', 'sldb']:
+            self.load_playlist(self.drag)
+        elif file_type in audio_formats:
+            self.add_song(path=self.drag)
+
+    # def set_next(self):
+    #     dialog = QDialog()
+    #     dialog.resize(400, 600)
+    #     buttons = QDialogButtonBox(dialog)
+    #     buttons.setGeometry(0, 500, 400, 100)
+    #     buttons.setStandardButtons(QDialogButtonBox.StandardButton.Cancel | QDialogButtonBox.StandardButton.Ok)
+    #     buttons.accepted.connect(dialog.accept)
+    #     buttons.rejected.connect(dialog.reject)
+    #     dialog.setWindowTitle("Set Next to play")
+    #     unset_button = QPushButton(dialog, "Unset next")
+    #     unset_button.setGeometry()
+
+    def edit(self, item=None):
+        if not isinstance(item, QModelIndex) and item is not None and not isinstance(item, bool):
+            to_edit = self.playlist[item.row()]
+        if not self.window().isActiveWindow() or self.playlist.is_empty_selection():
+            return
+        to_edit = next(iter(self.playlist.selected))
+        dialog = QDialog()
+        dialog.resize(300, 400)
+        name_label = QLabel("Name", dialog)
+        name_label.setGeometry(10, 10, 280, 20)
+        name_label.setAlignment(Qt.AlignmentFlag.AlignLeft)
+        name_edit = QTextEdit(to_edit.name, dialog)
+        name_edit.setGeometry(10, 30, 280, 100)
+        tags_label = QLabel("Tags (Artist is always the first tag)", dialog)
+        tags_label.setGeometry(10, 140, 280, 20)
+        tags_label.setAlignment(Qt.AlignmentFlag.AlignLeft)
+        tags_edit = QTextEdit(', '.join(to_edit.tags), dialog)
+        tags_edit.setGeometry(10, 160, 280, 120)
+        weight_label = QLabel("Weight:", dialog)
+        weight_label.setGeometry(10, 290, 280, 30)
+        weight_label.setAlignment(Qt.AlignmentFlag.AlignLeft)
+        weight_edit = QSpinBox(dialog)
+        weight_edit.setGeometry(180, 290, 100, 30)
+        weight_edit.setValue(to_edit.weight)
+        weight_edit.setMinimum(1)
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Cancel | QDialogButtonBox.StandardButton.Ok, dialog)
+        buttons.accepted.connect(dialog.accept)
+        buttons.rejected.connect(dialog.reject)
+        buttons.setGeometry(10, 325, 280, 75)
+        dialog.exec()
+        if dialog.result() == 1:
+            self.playlist.update(to_edit, name_edit.toPlainText(), tags_edit.toPlainText().split(', '), weight_edit.value())
+
+
+# entry points timed when instrumentation is on
+hot_paths = [
+    (Song, 'probe'),
+    (Playlist, 'extend'),
+    (Playlist, 'set_filter'),
+    (PlaylistModel, 'set_playlist'),
+    (PlaylistModel, 'data'),
+    (Player, 'play_song'),
+    (Player, 'refresh_progress'),
+    (Player, 'refresh_selection_highlight'),
+    (Player, 'edit_config'),
+    (Player, 'timerEvent'),
+]
+
+
+def main(started=None):
+    """
+    starts the program, returning its exit code once the window is closed; started is the perf_counter() reading taken
+    before the imports, for the startup report
+    """
+    if sys.platform == 'win32':
+        from ctypes import windll
+        windll.shell32.SetCurrentProcessExplicitAppUserModelID("shellac")
+
+    phases = [('imports', started)] if started is not None else []
+    phases.append(('application', time.perf_counter()))
+    app = QApplication(sys.argv)
+    app.setWindowIcon(QIcon('assets/Shellac.ico'))
+
+    phases.append(('theme', time.perf_counter()))
+    apply_theme(app)  # before the window exists, so its widgets are only polished once
+
+    phases.append(('window', time.perf_counter()))
+    w = Player()
+    w.setWindowIcon(QIcon('assets/Shellac.ico'))
+    w.show()
+
+    phases.append(('first paint', time.perf_counter()))
+
+    def report_startup():
+        phases.append(('', time.perf_counter()))
+        times = [(name, (end - start) * 1000) for (name, start), (_, end) in zip(phases, phases[1:])]
+        for name, ms in times:
+            instruments.record(f'startup: {name}', ms)
+        print('Started in ' + f'{sum(ms for _, ms in times):.0f} ms (' + ', '.join(f'{name} {ms:.0f} ms' for name, ms in times) + ')')
+    QTimer.singleShot(0, report_startup)  # runs once the event loop has drawn the window
+    return app.exec()
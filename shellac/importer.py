@@ -0,0 +1,174 @@
+"""
+background importing of folders and loading of large .slp playlists
+"""
+import os
+import queue
+from threading import Thread, Event, Lock
+from concurrent.futures import ThreadPoolExecutor
+
+from .util import audio_formats, parse_slp_line
+from .song import Song
+from .index import ContentIndex
+from .library import Library
+
+
+class FolderImporter:
+    """
+    walks a folder on a background thread and probes the songs in it on a thread pool, queueing them up in batches for the GUI thread to insert
+    """
+    action = 'importing'
+
+    def __init__(self, path, workers=8, batch_size=250, existing=()):
+        self.path = path
+        self.existing = list(existing)  # paths already in the playlist, which are not imported again
+        self.index = None
+        self.duplicates = 0
+        self.lock = Lock()  # guards duplicates, counted from the pool threads
+        self.workers = workers
+        self.batch_size = batch_size
+        self.results = queue.Queue()
+        self.cancelled = Event()
+        self.found = 0
+        self.probed = 0
+        self.finished = False
+        self.thread = Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def walk(self):
+        for root, dir, files in os.walk(self.path):
+            if self.cancelled.is_set():
+                return
+            for file in files:
+                if file.split('.')[-1] in audio_formats:
+                    yield os.path.join(root, file)
+
+    def probe(self, file):
+        try:
+            if self.index.duplicate_of(file) is not None:
+                with self.lock:
+                    self.duplicates += 1
+                return None
+            return Song(file)
+        except Exception as e:
+            print(f'ERROR: Could not read {file}: {e}')
+            return None
+
+    def run(self):
+        try:
+            self.index = ContentIndex()
+            with ThreadPoolExecutor(self.workers) as pool:
+                # the playlist's files are indexed by payload length while the folder is walked, and only hashed if needed
+                known = [pool.submit(self.index.add, path) for path in self.existing]
+                files = []
+                for file in self.walk():
+                    files.append(file)
+                    self.found += 1
+                if self.cancelled.is_set():
+                    pool.shutdown(cancel_futures=True)
+                    return
+                for future in known:
+                    future.result()
+                batch = []
+                for future in [pool.submit(self.probe, file) for file in files]:
+                    if self.cancelled.is_set():
+                        pool.shutdown(cancel_futures=True)
+                        break
+                    song = future.result()
+                    self.probed += 1
+                    if song is not None:
+                        batch.append(song)
+                    if len(batch) >= self.batch_size:
+                        self.results.put(batch)
+                        batch = []
+                if batch:
+                    self.results.put(batch)
+        finally:
+            self.finished = True
+
+
+class PlaylistLoader(FolderImporter):
+    """
+    streams the songs of a .slp file to the GUI thread straight from their stored fields, then probes their files
+    on a thread pool so durations can be filled in and missing files dropped while the playlist is already in use
+    """
+    action = 'loading'
+
+    def __init__(self, path, workers=8, batch_size=250):
+        super().__init__(path, workers, batch_size)
+        self.updates = queue.Queue()  # batches of (song, duration), with None for files that could not be read
+
+    def read(self):
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    if self.cancelled.is_set():
+                        return
+                    if not line.strip():
+                        continue
+                    data = parse_slp_line(line)
+                    yield Song(data['path'], data['name'], int(data['weight']), data['tags'].split(', '), lazy=True)
+        except FileNotFoundError:
+            return
+
+    @staticmethod
+    def probe(song):
+        try:
+            return song, Song.probe(song.path)[1]
+        except Exception as e:
+            print(f'ERROR: Could not read {song.path}: {e}')
+            return song, None
+
+    def run(self):
+        try:
+            songs = []
+            batch = []
+            for song in self.read():
+                songs.append(song)
+                batch.append(song)
+                self.found += 1
+                if len(batch) >= self.batch_size:
+                    self.results.put(batch)
+                    batch = []
+            if batch:
+                self.results.put(batch)
+            with ThreadPoolExecutor(self.workers) as pool:
+                batch = []
+                for future in [pool.submit(self.probe, song) for song in songs]:
+                    if self.cancelled.is_set():
+                        pool.shutdown(cancel_futures=True)
+                        break
+                    batch.append(future.result())
+                    self.probed += 1
+                    if len(batch) >= self.batch_size:
+                        self.updates.put(batch)
+                        batch = []
+                if batch:
+                    self.updates.put(batch)
+        finally:
+            self.finished = True
+
+
+class LibraryLoader(PlaylistLoader):
+    """
+    loads an .sldb library the way PlaylistLoader loads a .slp file, reading the database on the loader thread; songs
+    stored with a duration are only checked for existence rather than probed again
+    """
+    @staticmethod
+    def probe(song):
+        if song.length is None:
+            return PlaylistLoader.probe(song)
+        return song, song.length if os.path.exists(song.path) else None
+
+    def read(self):
+        if not os.path.exists(self.path):  # sqlite would create an empty library in its place
+            return
+        with Library(self.path) as library:
+            for song in library.load():
+                if self.cancelled.is_set():
+                    return
+                yield song
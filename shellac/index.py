@@ -0,0 +1,158 @@
+"""
+content hashing of audio files, used to spot duplicates regardless of their tags
+"""
+import os
+import mmap
+import hashlib
+from threading import Lock, Event
+
+
+def audio_payload(data):
+    """
+    the (start, end) byte range of an audio file's data, leaving out ID3v2, ID3v1 and APE tags and FLAC metadata blocks
+    """
+    start, end = 0, len(data)
+    while end - start >= 10 and data[start:start+3] == b'ID3':
+        size = (data[start+6] & 0x7f) << 21 | (data[start+7] & 0x7f) << 14 | (data[start+8] & 0x7f) << 7 | data[start+9] & 0x7f
+        start += 10 + size + (10 if data[start+5] & 0x10 else 0)  # header, tag and optional footer
+    if data[start:start+4] == b'fLaC':
+        start += 4
+        while start + 4 <= end:
+            header = data[start]
+            start += 4 + int.from_bytes(data[start+1:start+4], 'big')
+            if header & 0x80:  # last metadata block
+                break
+    if end - start >= 128 and data[end-128:end-125] == b'TAG':
+        end -= 128
+    if end - start >= 32 and data[end-32:end-24] == b'APETAGEX':
+        flags = int.from_bytes(data[end-12:end-8], 'little')
+        end -= int.from_bytes(data[end-20:end-16], 'little') + (32 if flags & 0x80000000 else 0)
+    return min(start, len(data)), max(min(end, len(data)), min(start, len(data)))
+
+
+def payload_length(path):
+    """
+    the length of a file's audio payload, for which only the pages holding its tags are read
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            start, end = audio_payload(data)
+    return end - start
+
+
+def content_hash(path, limit=None):
+    """
+    returns the length of a file's audio payload and a hash of it, or of just its first limit bytes,
+    reading the file through mmap in chunks
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return 0, digest.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            start, end = audio_payload(data)
+            stop = end if limit is None else min(end, start + limit)
+            view = memoryview(data)
+            try:
+                for i in range(start, stop, 1 << 20):
+                    digest.update(view[i:min(i + (1 << 20), stop)])
+            finally:
+                view.release()
+    return end - start, digest.hexdigest()
+
+
+class ContentIndex:
+    """
+    finds files holding the same audio, comparing payload lengths and hashes of their first bytes before hashing whole
+    payloads; known files are only hashed once a file with the same payload length turns up, and hashes are kept in
+    ContentIndex.cache so files are not read again
+    """
+    cache = None
+    partial_size = 1 << 16
+
+    def __init__(self, paths=()):
+        self.by_key = {}  # (payload length, partial hash) -> paths
+        self.by_hash = {}  # full hash -> path
+        self.unhashed = {}  # payload length -> known paths not hashed yet, as no other file has had that length
+        self.seeding = {}  # payload length -> Event set once its known paths are in by_key
+        self.lock = Lock()
+        for path in paths:
+            self.add(path)
+
+    def add(self, path):
+        """
+        indexes a known file by its payload length alone, leaving its hashes until a file of the same length is looked up
+        """
+        entry = self.cache.get(path) if self.cache is not None else None
+        try:
+            length = entry['payload'] if entry is not None and 'payload' in entry else payload_length(path)
+            if self.cache is not None and (entry is None or 'payload' not in entry):
+                self.cache.put(path, payload=length)
+        except OSError:
+            return
+        with self.lock:
+            self.unhashed.setdefault(length, []).append(path)
+
+    def seed(self, length):
+        """
+        moves the known files of a payload length into by_key, hashing them on the first thread to need them while the
+        others wait
+        """
+        with self.lock:
+            paths = self.unhashed.pop(length, None)
+            if paths is not None:
+                self.seeding[length] = Event()
+            ready = self.seeding.get(length)
+        if paths is None:
+            if ready is not None:
+                ready.wait()
+            return
+        try:
+            for path in paths:
+                try:
+                    entry = self.hashes(path)
+                except OSError:
+                    continue
+                with self.lock:
+                    candidates = self.by_key.setdefault((entry['payload'], entry['partial']), [])
+                    if path not in candidates:
+                        candidates.append(path)
+        finally:
+            ready.set()
+
+    def hashes(self, path, full=False):
+        entry = self.cache.get(path) if self.cache is not None else None
+        if entry is None or 'partial' not in entry or full and 'hash' not in entry:
+            fields = dict(zip(('payload', 'partial'), content_hash(path, self.partial_size)))
+            if full:
+                fields['hash'] = fields['partial'] if fields['payload'] <= self.partial_size else content_hash(path)[1]
+            entry = self.cache.put(path, **fields) if self.cache is not None else fields
+        return entry
+
+    def duplicate_of(self, path):
+        """
+        the indexed path holding the same audio as path, or None after indexing path as new
+        """
+        entry = self.hashes(path)
+        key = entry['payload'], entry['partial']
+        self.seed(entry['payload'])
+        with self.lock:
+            candidates = self.by_key.setdefault(key, [])
+            if path in candidates:
+                return path
+            if not candidates:
+                candidates.append(path)
+                return None
+            candidates = candidates[:]
+        hashes = {self.hashes(i, full=True)['hash']: i for i in candidates}  # only files sharing the cheap key are read whole
+        digest = self.hashes(path, full=True)['hash']
+        with self.lock:
+            for i, candidate in hashes.items():
+                self.by_hash.setdefault(i, candidate)
+            if digest in self.by_hash:
+                return self.by_hash[digest]
+            self.by_hash[digest] = path
+            self.by_key[key].append(path)
+        return None
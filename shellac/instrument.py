@@ -0,0 +1,203 @@
+"""
+opt-in timing of hot paths and detection of event loop stalls. nothing is patched or started until Instrumentation.enable
+is called, so leaving it off costs nothing
+"""
+import sys
+import json
+import time
+import bisect
+import functools
+import traceback
+from threading import Thread, Lock, Event, get_ident
+
+
+bounds = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 10000)  # upper bounds of the histogram buckets in ms
+
+
+class Histogram:
+    """
+    call durations in milliseconds, bucketed on a roughly logarithmic scale
+    """
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(bounds) + 1)  # the last bucket takes everything over bounds[-1]
+
+    def add(self, ms):
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+        self.buckets[bisect.bisect_left(bounds, ms)] += 1
+
+    def percentile(self, p):
+        """
+        upper bound of the bucket holding the p-th fraction of calls, capped to the slowest call
+        """
+        if self.count == 0:
+            return 0.0
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= p * self.count:
+                return min(bounds[i], self.max) if i < len(bounds) else self.max
+        return self.max
+
+    def to_dict(self):
+        labels = [f'<={i}' for i in bounds] + [f'>{bounds[-1]}']
+        return {'count': self.count, 'total_ms': self.total, 'mean_ms': self.total / self.count if self.count else 0.0,
+                'p50_ms': self.percentile(0.5), 'p95_ms': self.percentile(0.95), 'max_ms': self.max,
+                'buckets': {label: n for label, n in zip(labels, self.buckets) if n}}
+
+
+class StallWatchdog:
+    """
+    watches a thread that calls beat() regularly from its event loop, and records the stack of that thread whenever the
+    beats stop for longer than threshold seconds
+    """
+    def __init__(self, stats, threshold=0.1, period=0.02, thread_id=None):
+        self.stats = stats
+        self.threshold = threshold
+        self.period = period  # how often the watched thread is expected to beat
+        self.thread_id = get_ident() if thread_id is None else thread_id
+        self.last_beat = time.perf_counter()
+        self.stall = None  # the stall in progress, reported once the beats resume
+        self.lock = Lock()
+        self.stopped = Event()
+        self.thread = Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.last_beat = time.perf_counter()
+        self.thread.start()
+
+    def beat(self):
+        now = time.perf_counter()
+        with self.lock:
+            stall, self.stall = self.stall, None
+            last, self.last_beat = self.last_beat, now
+        if stall is not None:
+            stall['duration_ms'] = (now - last - self.period) * 1000
+            self.stats.add_stall(stall)
+
+    def run(self):
+        while not self.stopped.wait(self.threshold / 4):
+            with self.lock:
+                if self.stall is not None or time.perf_counter() - self.last_beat - self.period < self.threshold:
+                    continue
+                frame = sys._current_frames().get(self.thread_id)
+                self.stall = {'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+                              'stack': traceback.format_stack(frame) if frame is not None else []}
+
+    def stop(self):
+        self.stopped.set()
+
+
+class Instrumentation:
+    """
+    times calls to the methods it is told to hook and keeps counters, histograms and event loop stalls
+    """
+    def __init__(self):
+        self.lock = Lock()
+        self.histograms = {}
+        self.counters = {}
+        self.stalls = []
+        self.max_stalls = 100  # only the latest stalls are kept
+        self.hooks = []  # (owner, name, original attribute or None if it was inherited) of every patched method
+        self.watchdog = None
+
+    @property
+    def enabled(self):
+        return bool(self.hooks) or self.watchdog is not None
+
+    def record(self, name, ms):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(ms)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_stall(self, stall):
+        self.record('event loop stall', stall['duration_ms'])
+        with self.lock:
+            self.stalls.append(stall)
+            del self.stalls[:-self.max_stalls]
+
+    def wrap(self, function, label):
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            except BaseException:
+                self.count(f'{label} raised')
+                raise
+            finally:
+                self.record(label, (time.perf_counter() - start) * 1000)
+        return timed
+
+    def hook(self, owner, name):
+        """
+        replaces owner.name with a timed version of itself, keeping classmethods and staticmethods what they were
+        """
+        original = owner.__dict__.get(name)
+        attribute = getattr(owner, name) if original is None else original
+        label = f'{owner.__name__}.{name}'
+        if isinstance(attribute, (classmethod, staticmethod)):
+            timed = type(attribute)(self.wrap(attribute.__func__, label))
+        else:
+            timed = self.wrap(attribute, label)
+        setattr(owner, name, timed)
+        self.hooks.append((owner, name, original))
+
+    def enable(self, targets, stall_threshold=None):
+        """
+        hooks every (owner, name) in targets, and watches the calling thread for stalls over stall_threshold seconds;
+        returns the watchdog, whose beat() the event loop must call, or None
+        """
+        if self.enabled:
+            self.disable()
+        for owner, name in targets:
+            self.hook(owner, name)
+        if stall_threshold:
+            self.watchdog = StallWatchdog(self, stall_threshold)
+            self.watchdog.start()
+        return self.watchdog
+
+    def disable(self):
+        """
+        puts back every hooked method and stops the watchdog, keeping what was recorded
+        """
+        for owner, name, original in reversed(self.hooks):
+            if original is None:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
+        self.hooks.clear()
+        if self.watchdog is not None:
+            self.watchdog.stop()
+            self.watchdog = None
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+            self.stalls.clear()
+
+    def snapshot(self):
+        with self.lock:
+            return {'histograms': {name: histogram.to_dict() for name, histogram in sorted(self.histograms.items())},
+                    'counters': dict(sorted(self.counters.items())),
+                    'stalls': [dict(stall) for stall in self.stalls]}
+
+    def export(self, path):
+        snapshot = self.snapshot()
+        snapshot['time'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+        with open(path, 'w') as f:
+            json.dump(snapshot, f, indent=1)
+
+
+instruments = Instrumentation()
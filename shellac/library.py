@@ -0,0 +1,117 @@
+"""
+the sqlite song library
+"""
+import re
+import sqlite3
+
+from .util import parse_slp_line, format_slp_line
+from .song import Song
+
+
+class Library:
+    """
+    playlist store in a single SQLite file, keeping songs, tags, weights and durations in indexed tables
+    """
+    separator = '\x1f'  # put in front of every tag in songs.tag_text, a copy of the song's tags that loads without a join
+    schema = """
+        CREATE TABLE IF NOT EXISTS songs (
+            id INTEGER PRIMARY KEY,
+            position INTEGER NOT NULL,
+            path TEXT NOT NULL,
+            name TEXT NOT NULL UNIQUE,
+            weight INTEGER NOT NULL DEFAULT 1,
+            duration REAL,
+            tag_text TEXT
+        );
+        CREATE INDEX IF NOT EXISTS songs_position ON songs (position);
+        CREATE TABLE IF NOT EXISTS tags (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        );
+        CREATE TABLE IF NOT EXISTS song_tags (
+            song INTEGER NOT NULL REFERENCES songs (id) ON DELETE CASCADE,
+            tag INTEGER NOT NULL REFERENCES tags (id),
+            ord INTEGER NOT NULL,
+            PRIMARY KEY (song, ord)
+        );
+        CREATE INDEX IF NOT EXISTS song_tags_tag ON song_tags (tag, song);
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute('PRAGMA foreign_keys = ON')
+        self.db.executescript(self.schema)
+        self.db.create_function('REGEXP', 2, lambda pattern, name: re.search(pattern, name) is not None, deterministic=True)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def save(self, songs):
+        """
+        replaces the stored songs with songs, in order
+        """
+        songs = list({song.name: song for song in reversed(list(songs))}.values())[::-1]  # names are unique in the store
+        with self.db:
+            self.db.execute('DELETE FROM song_tags')
+            self.db.execute('DELETE FROM songs')
+            self.db.executemany('INSERT OR IGNORE INTO tags (name) VALUES (?)', [(tag,) for tag in {tag for song in songs for tag in song.tags}])
+            tag_ids = dict(self.db.execute('SELECT name, id FROM tags'))
+            self.db.executemany('INSERT OR IGNORE INTO songs (id, position, path, name, weight, duration, tag_text) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                [(i, i, song.path, song.name, song.weight, song.length, ''.join(self.separator + tag for tag in song.tags))
+                                 for i, song in enumerate(songs)])
+            self.db.executemany('INSERT INTO song_tags (song, tag, ord) VALUES (?, ?, ?)',
+                                [(i, tag_ids[tag], j) for i, song in enumerate(songs) for j, tag in enumerate(song.tags)])
+            self.db.execute('DELETE FROM tags WHERE id NOT IN (SELECT tag FROM song_tags)')
+
+    def load(self, filter=None):
+        """
+        returns the stored songs in order, only those passing filter if one is given; durations come from the store
+        """
+        where, params = self.where(filter) if filter is not None else ('1', [])
+        rows = self.db.execute(f'SELECT path, name, weight, duration, tag_text FROM songs WHERE {where} ORDER BY position', params).fetchall()
+        return [Song(path, name, weight, tag_text.split(self.separator)[1:], duration, lazy=True)
+                for path, name, weight, duration, tag_text in rows]
+
+    @staticmethod
+    def where(filter):
+        """
+        translates a Filter into an SQL condition on the songs table, with the same semantics as Filter.check
+        """
+        params = []
+        regex = 'songs.name REGEXP ?'
+        if filter.regex_enabled:
+            params.append(filter.regex)
+        rules = []
+        has_tag = 'EXISTS (SELECT 1 FROM song_tags JOIN tags ON tags.id = song_tags.tag WHERE song_tags.song = songs.id AND tags.name = ?)'
+        for rule in filter.tags:
+            rules.append('(' + ' AND '.join([has_tag if positive else 'NOT ' + has_tag for tag, positive in rule] or ['1']) + ')')
+            params.extend(tag for tag, positive in rule)
+        tags = '(' + ' OR '.join(rules) + ')'
+        if not filter.regex_enabled and not filter.tags_enabled:
+            return '1', []
+        if not filter.regex_enabled:
+            return tags, params
+        if not filter.tags_enabled:
+            return regex, params
+        return f"({regex} {'AND' if filter.strict else 'OR'} {tags})", params
+
+    def import_slp(self, file):
+        with open(file) as f:
+            songs = []
+            for line in f:
+                if not line.strip():
+                    continue
+                data = parse_slp_line(line)
+                songs.append(Song(data['path'], data['name'], int(data['weight']), data['tags'].split(', '), lazy=True))
+        self.save(songs)
+
+    def export_slp(self, file):
+        with open(file, mode='w+') as f:
+            f.writelines(format_slp_line(song) for song in self.load())
@@ -0,0 +1,100 @@
+"""
+the Qt table model showing a playlist
+"""
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from .util import std_time
+
+
+class PlaylistModel(QAbstractTableModel):
+    """
+    table view over the filtered rows of a Playlist, which notifies the model of every change it makes through the methods below
+    """
+    def __init__(self, parent=None, playlist=None):
+        super().__init__(parent)
+        self.playlist = None
+        self.rows = {}  # song -> display strings, formatted when the row is first drawn
+        self.moving = False
+        self.headers = ['Name', 'Length', 'Tags', 'Artist', 'Weight']
+        self.set_playlist(playlist)
+
+    def set_playlist(self, playlist):
+        self.beginResetModel()
+        if self.playlist is not None and self.playlist.listener is self:
+            self.playlist.listener = None
+        self.playlist = playlist
+        if playlist is not None:
+            playlist.listener = self
+        self.rows.clear()
+        self.endResetModel()
+
+    def begin_insert(self, first, last):
+        self.beginInsertRows(QModelIndex(), first, last)
+
+    def end_insert(self):
+        self.endInsertRows()
+
+    def begin_remove(self, first, last):
+        for row in range(first, last + 1):
+            self.rows.pop(self.playlist[row], None)
+        self.beginRemoveRows(QModelIndex(), first, last)
+
+    def end_remove(self):
+        self.endRemoveRows()
+
+    def begin_move(self, first, last, to):
+        self.moving = self.beginMoveRows(QModelIndex(), first, last, QModelIndex(), to)
+
+    def end_move(self):
+        if self.moving:
+            self.endMoveRows()
+        self.moving = False
+
+    def begin_layout(self):
+        self.layoutAboutToBeChanged.emit()
+
+    def end_layout(self, rows):
+        """
+        rows maps each row before the change to its row afterwards
+        """
+        old = self.persistentIndexList()
+        self.changePersistentIndexList(old, [self.index(rows[i.row()], i.column()) for i in old])
+        self.layoutChanged.emit()
+
+    def begin_reset(self):
+        self.beginResetModel()
+
+    def end_reset(self):
+        self.rows.clear()
+        self.endResetModel()
+
+    def changed(self, song, row):
+        self.rows.pop(song, None)
+        self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+
+    def format(self, song):
+        row = self.rows.get(song)
+        if row is None:
+            row = self.rows[song] = [song.name, std_time(song.length), ', '.join(song.tags), song.artist, song.weight]
+        return row
+
+    def rowCount(self, parent=None):
+        if self.playlist is None or parent is not None and parent.isValid():
+            return 0
+        return len(self.playlist)
+
+    def columnCount(self, parent=None):
+        return len(self.headers)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.format(self.playlist[index.row()])[index.column()]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole:
+            if orientation == Qt.Orientation.Horizontal:
+                return self.headers[section]
+        return None
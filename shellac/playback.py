@@ -0,0 +1,195 @@
+"""
+gapless and crossfading playback on a pair of Qt media players
+"""
+import time
+
+from PyQt6.QtCore import QUrl
+from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
+
+
+class Playback:
+    """
+    plays through one QMediaPlayer while a second one buffers the track expected next, so that switching to it
+    skips the decoder start-up; with a crossfade the outgoing track keeps playing and fades out under the new one
+    """
+    def __init__(self, path=None, crossfade=0):
+        self.volume = 66
+        self.crossfade = crossfade  # seconds
+        self.media_player, self.audio_output = self.create()
+        self.next_player, self.next_output = self.create()
+        self.next_path = None  # the file buffered in next_player
+        self.fading = None  # the outgoing player during a crossfade, which is also next_player
+        self.fade_level = 1
+        self.gain = 1  # per-track loudness correction of the current track, and of the fading one during a crossfade
+        self.fading_gain = 1
+        self.pending = None  # a file to buffer once the crossfade is over
+        self.device_hooks = []  # called with (device, seconds) after every switch of output device
+        self.set_volume(self.volume)
+        if path:
+            self.media_player.setSource(QUrl.fromLocalFile(path))
+
+    def create(self):
+        media_player = QMediaPlayer()
+        audio_output = QAudioOutput()
+        media_player.setAudioOutput(audio_output)
+        media_player.positionChanged.connect(self.fade_step)
+        media_player.mediaStatusChanged.connect(lambda status, p=media_player: self.fade_ended(p, status))
+        return media_player, audio_output
+
+    def connect(self, signal, handler):
+        """
+        connects handler to a signal of whichever player is currently playing, ignoring the one on standby
+        """
+        for player in (self.media_player, self.next_player):
+            getattr(player, signal).connect(lambda *args, p=player: handler(*args) if p is self.media_player else None)
+
+    def load(self, path):
+        if path == self.next_path and self.fading is None and self.standby_ready:
+            self.swap()
+            return
+        self.finish_fade()
+        self.media_player.setSource(QUrl.fromLocalFile(path))
+
+    def preload(self, path):
+        """
+        buffers path on the standby player, to be switched to when it is next loaded
+        """
+        if self.fading is not None:
+            self.pending = path
+            return
+        if path == self.next_path:
+            return
+        self.next_path = path
+        self.next_player.setSource(QUrl() if path is None else QUrl.fromLocalFile(path))
+
+    def swap(self):
+        old_player, old_output = self.media_player, self.audio_output
+        self.media_player, self.audio_output = self.next_player, self.next_output
+        self.next_player, self.next_output = old_player, old_output
+        self.next_path = None
+        if self.crossfade > 0 and old_player.playbackState() == QMediaPlayer.PlaybackState.PlayingState:
+            self.fading = old_player
+            self.fading_gain = self.gain
+            self.fade_level = 0
+        else:
+            old_player.stop()
+            old_player.setSource(QUrl())
+
+    def fade_step(self, position):
+        if self.fading is None:
+            return
+        self.fade_level = min(1, self.media_player.position() / (self.crossfade * 1000))
+        self.set_volume(self.volume)
+        if self.fade_level >= 1:
+            self.finish_fade()
+
+    def fade_ended(self, player, status):
+        if player is self.fading and status == QMediaPlayer.MediaStatus.EndOfMedia:
+            self.finish_fade()
+
+    def finish_fade(self):
+        if self.fading is None:
+            return
+        self.fading.stop()
+        self.fading.setSource(QUrl())
+        self.fading = None
+        self.fade_level = 1
+        self.set_volume(self.volume)
+        pending, self.pending = self.pending, None
+        self.preload(pending)
+
+    @property
+    def standby_ready(self):
+        """
+        whether the standby player has finished loading next_path, so that it can start without a gap
+        """
+        return self.next_player.mediaStatus() in [QMediaPlayer.MediaStatus.LoadedMedia, QMediaPlayer.MediaStatus.BufferedMedia]
+
+    @property
+    def in_crossfade(self):
+        """
+        whether the current track is close enough to its end to start fading into the buffered one; until that one has
+        loaded the current track plays on, and if it never does the switch happens at the end as a plain swap
+        """
+        return (self.crossfade > 0 and self.fading is None and self.next_path is not None and self.standby_ready and self.is_playing
+                and 0 < self.media_player.duration() - self.media_player.position() <= self.crossfade * 1000)
+
+    def seek(self, pos):
+        if not self.is_valid:
+            return
+        self.media_player.setPosition(pos*1000)
+
+    def play(self):
+        self.media_player.play()
+
+    def pause(self):
+        self.finish_fade()
+        self.media_player.pause()
+
+    def resume(self):
+        self.media_player.play()
+
+    def stop(self):
+        self.finish_fade()
+        self.media_player.stop()
+        self.media_player.setSource(QUrl())  # releases the file, keeping the player and its signal connections
+
+    def clear(self):
+        self.stop()
+
+    def set_volume(self, v):
+        self.volume = v
+        # print(v)
+        # self.audio_output.setVolume(QAudio.convertVolume(v, QAudio.VolumeScale.LogarithmicVolumeScale, QAudio.VolumeScale.LinearVolumeScale))
+        self.audio_output.setVolume(v * self.gain * self.fade_level)
+        if self.fading is not None:
+            self.next_output.setVolume(v * self.fading_gain * (1 - self.fade_level))
+
+    def set_gain(self, gain):
+        """
+        scales the current track's volume by gain, such as to bring it to a common loudness
+        """
+        self.gain = gain
+        self.set_volume(self.volume)
+
+    def set_device(self, device):
+        """
+        moves both outputs to device, restoring the position and state if the backend interrupted playback
+        """
+        start = time.perf_counter()
+        position, state = self.media_player.position(), self.media_player.playbackState()
+        self.audio_output.setDevice(device)
+        self.next_output.setDevice(device)
+        if self.media_player.playbackState() != state:
+            self.media_player.setPosition(position)
+            if state == QMediaPlayer.PlaybackState.PlayingState:
+                self.media_player.play()
+            elif state == QMediaPlayer.PlaybackState.PausedState:
+                self.media_player.pause()
+        elapsed = time.perf_counter() - start
+        for hook in self.device_hooks:
+            hook(device, elapsed)
+
+    @property
+    def duration(self):
+        return self.media_player.duration() / 1000
+
+    @property
+    def curr_pos(self):
+        return self.media_player.position() / 1000
+
+    @property
+    def is_paused(self):
+        return self.media_player.playbackState() == QMediaPlayer.PlaybackState.PausedState
+
+    @property
+    def is_playing(self):
+        return self.media_player.playbackState() == QMediaPlayer.PlaybackState.PlayingState
+
+    @property
+    def is_stopped(self):
+        return self.media_player.playbackState() == QMediaPlayer.PlaybackState.StoppedState
+
+    @property
+    def is_valid(self):
+        return self.media_player.mediaStatus() in [QMediaPlayer.MediaStatus.EndOfMedia, QMediaPlayer.MediaStatus.LoadedMedia, QMediaPlayer.MediaStatus.BufferedMedia]
@@ -0,0 +1,605 @@
+"""
+the playlist, its ordering, filtering and weighted random draws
+"""
+from random import random
+
+import numpy as np
+
+from .filter import Filter, TagIndex
+from .song import Song
+
+
+class PositionArray:
+    """
+    sorted positions into a master list, kept in a growable numpy buffer so that rank and select lookups are a binary search or an index away
+    """
+    def __init__(self, positions=()):
+        positions = np.asarray(positions, dtype=np.int64)
+        self.count = len(positions)
+        self.data = np.empty(max(16, 2 * self.count), dtype=np.int64)
+        self.data[:self.count] = positions
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def array(self):
+        return self.data[:self.count]
+
+    def select(self, k):
+        """
+        the k-th smallest position
+        """
+        if k < 0:
+            k += self.count
+        if not 0 <= k < self.count:
+            raise IndexError(k)
+        return int(self.data[k])
+
+    def rank(self, position):
+        """
+        the number of positions smaller than position
+        """
+        return int(np.searchsorted(self.data[:self.count], position))
+
+    def contains(self, position):
+        i = self.rank(position)
+        return i < self.count and self.data[i] == position
+
+    def insert(self, position):
+        if self.count == len(self.data):
+            self.data = np.concatenate([self.data, np.empty(len(self.data), dtype=np.int64)])
+        i = self.rank(position)
+        self.data[i+1:self.count+1] = self.data[i:self.count]
+        self.data[i] = position
+        self.count += 1
+        return i
+
+    def extend(self, positions):
+        """
+        appends positions that are all greater than the ones already stored
+        """
+        while self.count + len(positions) > len(self.data):
+            self.data = np.concatenate([self.data, np.empty(len(self.data), dtype=np.int64)])
+        self.data[self.count:self.count+len(positions)] = positions
+        self.count += len(positions)
+
+    def remove(self, position):
+        i = self.rank(position)
+        self.data[i:self.count-1] = self.data[i+1:self.count]
+        self.count -= 1
+        return i
+
+    def remove_rows(self, first, stop):
+        """
+        drops the positions ranked [first, stop)
+        """
+        self.data[first:self.count-(stop-first)] = self.data[stop:self.count]
+        self.count -= stop - first
+
+    def shift(self, start, delta, stop=None):
+        """
+        adds delta to every position in [start, stop)
+        """
+        i = self.rank(start)
+        j = self.count if stop is None else self.rank(stop)
+        self.data[i:j] += delta
+
+
+class WeightTree:
+    """
+    Fenwick tree over per-slot weights, supporting point updates, prefix sums and weighted draws in O(log n)
+    """
+    def __init__(self, weights=()):
+        self.build(weights)
+
+    def build(self, weights):
+        self.weights = list(weights)
+        sums = np.concatenate([[0], np.cumsum(self.weights)])
+        i = np.arange(len(sums))
+        self.tree = (sums - sums[i - (i & -i)]).tolist()
+
+    def __len__(self):
+        return len(self.weights)
+
+    @property
+    def total(self):
+        return self.prefix(len(self.weights))
+
+    def catch_up(self):
+        """
+        extends the tree over slots appended since it was last used, rebuilding it outright if many were
+        """
+        missing = len(self.weights) + 1 - len(self.tree)
+        if missing <= 0:
+            return
+        if missing * 16 > len(self.weights):
+            self.build(self.weights)
+            return
+        for n in range(len(self.tree), len(self.weights) + 1):
+            self.tree.append(self.weights[n-1] + self.sum(n - 1) - self.sum(n - (n & -n)))
+
+    def sum(self, k):
+        total = 0
+        while k > 0:
+            total += self.tree[k]
+            k -= k & -k
+        return total
+
+    def prefix(self, k):
+        """
+        the sum of the weights of slots [0, k)
+        """
+        self.catch_up()
+        return self.sum(k)
+
+    def append(self, weight=0):
+        self.weights.append(weight)  # the tree catches up on its next use
+
+    def set(self, slot, weight):
+        self.catch_up()
+        delta = weight - self.weights[slot]
+        if delta == 0:
+            return
+        self.weights[slot] = weight
+        i = slot + 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def assign(self, items):
+        """
+        sets many (slot, weight) pairs at once, rebuilding the tree when that is cheaper than updating it
+        """
+        if len(items) * 16 > len(self.weights):
+            for slot, weight in items:
+                self.weights[slot] = weight
+            self.build(self.weights)
+        else:
+            for slot, weight in items:
+                self.set(slot, weight)
+
+    def find(self, x):
+        """
+        the slot whose weight covers x, i.e. prefix(slot) <= x < prefix(slot + 1)
+        """
+        self.catch_up()
+        pos = 0
+        step = 1 << (len(self.weights).bit_length() - 1) if self.weights else 0
+        while step:
+            if pos + step < len(self.tree) and self.tree[pos + step] <= x:
+                pos += step
+                x -= self.tree[pos]
+            step >>= 1
+        return pos
+
+
+class Playlist:
+    def __init__(self, lists=()):
+        self.list = list(lists)
+        self.view = PositionArray(range(len(self.list)))  # positions in self.list of the songs passing the filter
+        self.visible = set(self.list)
+        self.length = len(self.list)
+        self.names = {song.name: song for song in self.list}
+        self.positions = {}  # song -> index in self.list, valid below stale_from
+        self.stale_from = 0
+        self.slots = {song: slot for slot, song in enumerate(self.list)}  # song -> stable slot in the weight tree
+        self.slot_songs = self.list[:]
+        self.free_slots = []
+        self.weights = WeightTree([song.weight for song in self.list])
+        self.order = list(range(len(self.list)))  # slot of the song at each position of self.list
+        self.tag_index = TagIndex(self.list)  # tag -> bitmap of slots
+        self.filter = Filter()
+        self.selected = {}  # ordered set of the selected songs
+        self.listener = None
+
+    def notify(self, event, *args):
+        if self.listener is not None:
+            getattr(self.listener, event)(*args)
+
+    def select(self, song):
+        if song in self.visible:
+            self.selected.setdefault(song)
+
+    def clear_select(self):
+        self.selected.clear()
+
+    def reselect(self, song):
+        self.clear_select()
+        self.select(song)
+
+    def toggle_select(self, song):
+        if song in self.selected:
+            del self.selected[song]
+        elif song in self.visible:
+            self.selected[song] = None
+
+    def is_empty_selection(self):
+        return len(self.selected) == 0
+
+    def count_selected(self):
+        return len(self.selected)
+
+    def selected_rows(self):
+        """
+        the filtered positions of the selected songs, in ascending order
+        """
+        return sorted(self.get_row(song) for song in self.selected)
+
+    def selected_ranges(self):
+        """
+        the selected rows merged into contiguous (first, last) ranges
+        """
+        ranges = []
+        for row in self.selected_rows():
+            if ranges and ranges[-1][1] == row - 1:
+                ranges[-1][1] = row
+            else:
+                ranges.append([row, row])
+        return [tuple(i) for i in ranges]
+
+    def set_filter(self, filter):
+        self.notify('begin_reset')
+        self.filter = filter
+        passed = filter.compile().evaluate(self.slot_songs, self.tag_index)
+        positions = np.flatnonzero(passed[np.array(self.order, dtype=np.int64)])
+        self.view = PositionArray(positions)
+        self.visible = {self.list[i] for i in positions.tolist()}
+        self.weights.build([song.weight if ok and song is not None else 0 for song, ok in zip(self.slot_songs, passed.tolist())])
+        self.selected = {song: None for song in self.selected if song in self.visible}
+        self.notify('end_reset')
+
+    def add(self, song, position=None):
+        if song.name in self.names:
+            return
+        position = len(self.list) if position is None else min(position, len(self.list))
+        self.list.insert(position, song)
+        self.reindex(position)
+        self.view.shift(position, 1)
+        self.names[song.name] = song
+        self.order.insert(position, self.assign_slot(song))
+        if self.filter.check(song):
+            self.show(song, position)
+        self.catalog(song)
+        self.length += 1
+
+    def extend(self, songs):
+        """
+        appends songs in bulk, reporting all the new visible rows to the listener at once; songs with taken names are skipped
+        """
+        first = len(self.list)
+        added = []
+        for song in songs:
+            if song.name in self.names:
+                continue
+            self.names[song.name] = song
+            self.list.append(song)
+            self.order.append(self.assign_slot(song))
+            added.append(song)
+        self.tag_index.extend((self.slots[song], song.tags) for song in added)
+        self.reindex(first)
+        self.length += len(added)
+        shown = np.flatnonzero(self.filter.compile().evaluate(added)) + first
+        if len(shown) == 0:
+            return
+        row = len(self.view)
+        self.notify('begin_insert', row, row + len(shown) - 1)
+        self.view.extend(shown)
+        shown = [self.list[position] for position in shown.tolist()]
+        self.visible.update(shown)
+        self.weights.assign([(self.slots[song], song.weight) for song in shown])
+        self.notify('end_insert')
+
+    def assign_slot(self, song):
+        if self.free_slots:
+            self.slots[song] = self.free_slots.pop()
+            self.slot_songs[self.slots[song]] = song
+        else:
+            self.slots[song] = len(self.slot_songs)
+            self.slot_songs.append(song)
+            self.weights.append()
+        return self.slots[song]
+
+    def show(self, song, position):
+        """
+        adds the song at master position to the filtered view
+        """
+        row = self.view.rank(position)
+        self.notify('begin_insert', row, row)
+        self.view.insert(position)
+        self.visible.add(song)
+        self.weights.set(self.slots[song], song.weight)
+        self.notify('end_insert')
+
+    def hide(self, song, position):
+        """
+        removes the song at master position from the filtered view
+        """
+        row = self.view.rank(position)
+        self.notify('begin_remove', row, row)
+        self.view.remove(position)
+        self.visible.discard(song)
+        self.weights.set(self.slots[song], 0)
+        self.notify('end_remove')
+
+    def catalog(self, song):
+        self.tag_index.add(self.slots[song], song.tags)
+
+    def uncatalog(self, song):
+        self.tag_index.remove(self.slots[song], song.tags)
+
+    @property
+    def tags(self):
+        return self.tag_index.tags
+
+    def tag_count(self, tag):
+        return self.tag_index.count(tag)
+
+    def tagged(self, tag):
+        """
+        the songs carrying tag, in slot order
+        """
+        return [self.slot_songs[slot] for slot in self.tag_index.bitmap(tag)]
+
+    def get_filtered_position(self, pos):
+        return self.view.rank(pos)
+
+    def get_unfiltered_position(self, pos):
+        if pos >= len(self.view):
+            pos = len(self.view) - 1
+        return self.view.select(pos)
+
+    def get_row(self, song):
+        """
+        the position of the song within the filtered view, or None if it is filtered out
+        """
+        if song not in self.visible:
+            return None
+        return self.view.rank(self.get_index(song))
+
+    def __len__(self):
+        return len(self.view)
+
+    def __contains__(self, item):
+        return item in self.visible
+
+    def __getitem__(self, item):
+        if isinstance(item, Song):
+            return item
+        if isinstance(item, str):
+            return self.names[item]
+        return self.list[self.view.select(item)]
+
+    def __iter__(self):
+        return (self.list[i] for i in self.view.array.tolist())
+
+    def delete(self, indicator):
+        """
+        removes a song, given as a song, a name or a position in self.list, or a collection of them all at once
+        """
+        items = list(indicator) if isinstance(indicator, (tuple, list, set, dict)) else [indicator]
+        indices = set()
+        for item in items:
+            index = int(item) if isinstance(item, int) else self.get_index(item) if isinstance(item, (Song, str)) else None
+            if index is not None and 0 <= index < len(self.list):
+                indices.add(index)
+        if indices:
+            self.remove_positions(sorted(indices))
+
+    def remove_positions(self, indices):
+        """
+        removes the songs at the given ascending positions of self.list in one pass, telling the listener about every
+        contiguous run of removed rows, last run first so the rows of the others stay valid
+        """
+        removed = [self.list[i] for i in indices]
+        rows = [self.view.rank(i) for i, song in zip(indices, removed) if song in self.visible]
+        ranges = []
+        for row in rows:
+            if ranges and ranges[-1][1] == row - 1:
+                ranges[-1][1] = row
+            else:
+                ranges.append([row, row])
+        for first, last in reversed(ranges):
+            self.notify('begin_remove', first, last)
+            self.view.remove_rows(first, last + 1)
+            self.notify('end_remove')
+
+        start = indices[0]
+        gone = set(indices)
+        self.list[start:] = [song for i, song in enumerate(self.list[start:], start) if i not in gone]
+        self.order[start:] = [slot for i, slot in enumerate(self.order[start:], start) if i not in gone]
+        positions = self.view.array
+        positions -= np.searchsorted(np.array(indices, dtype=np.int64), positions)  # each position drops by the removals before it
+        self.reindex(start)
+        self.weights.assign([(self.slots[song], 0) for song in removed if song in self.visible])
+        for song in removed:
+            self.visible.discard(song)
+            del self.names[song.name]
+            self.positions.pop(song, None)
+            self.uncatalog(song)
+            slot = self.slots.pop(song)
+            self.slot_songs[slot] = None
+            self.free_slots.append(slot)
+            self.selected.pop(song, None)
+        self.length -= len(removed)
+
+    def get_index(self, id):
+        if isinstance(id, str):
+            id = self.names.get(id)
+        if not isinstance(id, Song):
+            return None
+        if self.stale_from < len(self.list):
+            for i in range(self.stale_from, len(self.list)):
+                self.positions[self.list[i]] = i
+            self.stale_from = len(self.list)
+        return self.positions.get(id)
+
+    def reindex(self, start):
+        """
+        marks the positions of every song from index start onwards as stale, to be repaired on the next lookup
+        """
+        self.stale_from = min(self.stale_from, start)
+
+    def get_song(self, id):
+        try:
+            id = round(float(id))
+        except ValueError:
+            pass
+        if isinstance(id, str):
+            return self.list[self.get_index(id)]
+        else:
+            return self.list[int(id)]
+
+    def random(self, last=None):
+        """
+        takes in the last played song (or its index) to be excluded or none, and returns the index and song to be played
+
+        :type last: int | Song
+        """
+        if len(self) == 0:
+            return None
+        last = self[last] if last is not None else None
+        excluded = self.weights.weights[self.slots[last]] if last in self.visible else 0
+        total = self.weights.total - excluded
+        if total <= 0:
+            return 0, self[0]
+        select = random() * total
+        if excluded and select >= self.weights.prefix(self.slots[last]):
+            select += excluded  # skip over the excluded song's share without copying the list
+        song = self.slot_songs[min(self.weights.find(select), len(self.slot_songs) - 1)]
+        if song not in self.visible:
+            song = self[-1] if self[-1] is not last else self[0]
+        return self.get_row(song), song
+
+    def change_position(self, song, to):
+        """
+        moves the song in front of the song currently at filtered position to, or to the end if to is past the last song
+        """
+        i = self.get_index(song)
+        if i is None:
+            return
+        to = min(to, len(self.view))
+        target = self.view.select(to) if to < len(self.view) else len(self.list)
+        j = target - 1 if target > i else target
+        if i == j:
+            return
+        shown = song in self.visible
+        if shown:
+            row = self.view.rank(i)
+            self.notify('begin_move', row, row, to)
+            self.view.remove(i)
+        self.list.insert(target, song)
+        self.list.pop(i if target > i else i + 1)
+        self.order.insert(target, self.slots[song])
+        self.order.pop(i if target > i else i + 1)
+        if j > i:
+            self.view.shift(i + 1, -1, j + 1)
+        else:
+            self.view.shift(j, 1, i)
+        self.reindex(min(i, j))
+        if shown:
+            self.view.insert(j)
+            self.notify('end_move')
+
+    def move(self, songs, k):
+        """
+        moves the given songs k rows down the filtered view (up if k is negative) in one pass: each song passes over k of the
+        songs not being moved, stopping at either end, and the moved songs keep their order among themselves
+        """
+        moving = {song for song in songs if song in self.visible}
+        if not moving or k == 0:
+            return
+        rows = list(self)
+        staying = [song for song in rows if song not in moving]
+        buckets = [[] for _ in range(len(staying) + 1)]
+        passed = 0
+        for song in rows:
+            if song in moving:
+                buckets[max(0, min(len(staying), passed + k))].append(song)
+            else:
+                passed += 1
+        order = []
+        for bucket, song in zip(buckets, staying):
+            order.extend(bucket)
+            order.append(song)
+        order.extend(buckets[-1])
+        if order == rows:
+            return
+
+        moved = [row for row, song in enumerate(rows) if song in moving]
+        new_first = order.index(rows[moved[0]])
+        contiguous = moved[-1] - moved[0] == len(moved) - 1
+        if contiguous:
+            self.notify('begin_move', moved[0], moved[-1], new_first if new_first < moved[0] else new_first + len(moved))
+        else:
+            self.notify('begin_layout')
+        positions = self.view.array.tolist()
+        for position, song in zip(positions, order):
+            self.list[position] = song
+            self.order[position] = self.slots[song]
+        self.reindex(positions[0])
+        if contiguous:
+            self.notify('end_move')
+        else:
+            rows_after = {song: row for row, song in enumerate(order)}
+            self.notify('end_layout', [rows_after[song] for song in rows])
+
+    def move_up(self, index, k, to_top=True, is_filtered=True):
+        song = self[index] if is_filtered else self.list[index]
+        self.move([song], -len(self) if to_top else -k)
+
+    def move_down(self, index, k, to_bottom=True, is_filtered=True):
+        song = self[index] if is_filtered else self.list[index]
+        self.move([song], len(self) if to_bottom else k)
+
+    def unique_name(self, name, taken=()):
+        """
+        name, or name with the first free number after it if a song already has it
+        """
+        if name not in self.names and name not in taken:
+            return name
+        i = 2
+        while f'{name} ({i})' in self.names or f'{name} ({i})' in taken:
+            i += 1
+        return f'{name} ({i})'
+
+    def retarget(self, song, path):
+        """
+        points a song at a new file, such as its transcoded copy
+        """
+        if self.get_index(song) is None:
+            return
+        song.path = path
+        if song in self.visible:
+            self.notify('changed', song, self.get_row(song))
+
+    def set_length(self, song, length):
+        song.length = length
+        if song in self.visible:
+            self.notify('changed', song, self.get_row(song))
+
+    def update(self, id, name=None, tags=None, weight=None):
+        song = self[id]
+        if self.get_index(song) is None:
+            return
+        if name is not None and name != song.name and name in self.names:
+            name = None  # names identify songs, so a rename onto another song's name is ignored
+        visible = song in self.visible
+        self.uncatalog(song)
+        if name is not None and name != song.name:
+            del self.names[song.name]
+            self.names[name] = song
+        song.name = song.name if name is None else name
+        song.tags = song.tags if tags is None else tags
+        song.weight = song.weight if weight is None else weight
+        if visible:
+            self.weights.set(self.slots[song], song.weight)
+        self.catalog(song)
+        if self.filter.check(song):
+            if visible:
+                self.notify('changed', song, self.get_row(song))
+            else:
+                self.show(song, self.get_index(song))
+        elif visible:
+            self.hide(song, self.get_index(song))
+            self.selected.pop(song, None)
@@ -0,0 +1,45 @@
+"""
+a single song and its probed metadata
+"""
+import os
+
+import tinytag
+
+
+class Song:
+    cache = None
+
+    def __init__(self, path, name=None, weight=1, tags=None, length=None, lazy=False):
+        self.path = path.replace('\\', '/')
+        if path[0:2] == './':
+            self.path = os.getcwd().replace('\\', '/') + path[1:]
+        self.name = name
+        self.weight = weight
+        self.length = length
+        if self.name is None or self.length is None and not lazy:  # stored songs come with both, so only new files are probed
+            title, self.length = self.probe(self.path)
+            if self.name is None:
+                self.name = title if title else ''.join(self.path.split('/')[-1].split('.')[:-1])
+        self.tags = [] if tags is None else tags
+
+    @classmethod
+    def probe(cls, path):
+        """
+        returns (title, duration) of an audio file, from the metadata cache when it is still valid
+        """
+        entry = cls.cache.get(path) if cls.cache is not None else None
+        if entry is not None and 'duration' in entry:
+            return entry['title'], entry['duration']
+        tag = tinytag.TinyTag.get(path)
+        if cls.cache is not None:
+            cls.cache.put(path, title=tag.title, duration=tag.duration)
+        return tag.title, tag.duration
+
+    @property
+    def artist(self):
+        if len(self.tags) == 0:
+            return '/'
+        return self.tags[0]
+
+    def __str__(self):
+        return f'{self.name}, {self.tags}, {self.weight}'
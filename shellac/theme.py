@@ -0,0 +1,128 @@
+"""
+the qt_material theme, built once and replayed from a cache on later launches
+"""
+import os
+import json
+import hashlib
+import importlib.util
+
+from PyQt6.QtCore import QDir
+from PyQt6.QtGui import QColor, QFontDatabase, QPalette
+from PyQt6.QtWidgets import QApplication
+
+
+class QSSLoader:
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def read_qss_file(qss_file_name):
+        with open(qss_file_name, 'r',  encoding='UTF-8') as file:
+            return file.read()
+
+
+class CallRecorder:
+    """
+    stands in for a Qt class while qt_material builds a theme, passing every call on and noting it down, so that a cached
+    launch can make the same calls without loading qt_material
+    """
+    replayable = {'QFontDatabase': QFontDatabase, 'QDir': QDir}
+
+    def __init__(self, target, calls):
+        self.target = target
+        self.calls = calls
+
+    def __getattr__(self, name):
+        method = getattr(self.target, name)
+
+        def record(*args):
+            self.calls.append([self.target.__name__, name, list(args)])
+            return method(*args)
+        return record
+
+    @classmethod
+    def replay(cls, calls):
+        for owner, name, args in calls:
+            getattr(cls.replayable[owner], name)(*args)
+
+
+def package_stamp(package):
+    """
+    a digest of the names, sizes and modification times of every file in the installed qt_material
+    """
+    digest = hashlib.sha1()
+    for root, dirs, files in os.walk(package):
+        dirs[:] = sorted(i for i in dirs if i != '__pycache__')
+        for file in sorted(files):
+            st = os.stat(os.path.join(root, file))
+            digest.update(f'{os.path.relpath(os.path.join(root, file), package)}:{st.st_size}:{st.st_mtime_ns}\n'.encode())
+    return digest.hexdigest()
+
+
+def palette_colors():
+    palette = QApplication.palette()
+    return {role.name: palette.color(role).name(QColor.NameFormat.HexArgb) for role in QPalette.ColorRole if role != QPalette.ColorRole.NColorRoles}
+
+
+def build_theme(theme, icons):
+    """
+    builds the qt_material stylesheet, applying the fonts, search paths, palette and environment that come with it, and
+    returns the stylesheet with a record of those side effects
+    """
+    import qt_material
+    missing = [name for name in CallRecorder.replayable if not hasattr(qt_material, name)]
+    if missing:  # the recording relies on these module globals, so a qt_material without them can't be cached
+        raise RuntimeError(f"qt_material no longer has {', '.join(missing)}, so its theme can't be recorded")
+    calls = []
+    palette = palette_colors()
+    environ = dict(os.environ)
+    originals = {name: getattr(qt_material, name) for name in CallRecorder.replayable}
+    try:
+        for name, target in CallRecorder.replayable.items():
+            setattr(qt_material, name, CallRecorder(target, calls))
+        style_sheet = qt_material.build_stylesheet(theme, parent=icons)
+    finally:
+        for name, original in originals.items():
+            setattr(qt_material, name, original)
+    return style_sheet, {'calls': calls,
+                         'palette': {role: color for role, color in palette_colors().items() if palette[role] != color},
+                         'environ': {key: value for key, value in os.environ.items() if environ.get(key) != value}}
+
+
+def apply_theme(app, theme='dark_teal.xml', style_file='styles/default.qss', cache_dir='./theme/'):
+    """
+    styles app with the qt_material theme followed by style_file, from a stylesheet compiled on the first launch: qt_material
+    and its template engine are only loaded again once the theme, style_file or the installed qt_material change
+    """
+    spec = importlib.util.find_spec('qt_material')
+    if spec is None:
+        print('ERROR: qt_material is not installed, so the program is left unthemed')
+        return
+    app.setStyle('Fusion')  # as qt_material.apply_stylesheet does by default
+    icons = os.path.abspath(os.path.join(cache_dir, 'icons'))
+    stamp = [theme, os.path.getmtime(style_file), package_stamp(os.path.dirname(spec.origin))]
+    try:
+        with open(os.path.join(cache_dir, 'theme.json')) as f:
+            cached = json.load(f)
+        with open(os.path.join(cache_dir, 'theme.qss'), encoding='UTF-8') as f:
+            style_sheet = f.read()
+    except (OSError, ValueError):
+        cached = None
+    if cached is None or cached.get('stamp') != stamp or not os.path.isdir(icons):
+        os.makedirs(cache_dir, exist_ok=True)
+        # besides the stylesheet, this colours the icons into the cache, and its other effects are recorded for replaying
+        style_sheet, effects = build_theme(theme, icons)
+        style_sheet += '\n' + QSSLoader.read_qss_file(style_file)
+        cached = {'stamp': stamp, **effects}
+        with open(os.path.join(cache_dir, 'theme.qss'), 'w', encoding='UTF-8') as f:
+            f.write(style_sheet)
+        with open(os.path.join(cache_dir, 'theme.json'), 'w') as f:
+            json.dump(cached, f)
+    else:
+        CallRecorder.replay(cached['calls'])
+        palette = QApplication.palette()
+        for role, color in cached['palette'].items():
+            palette.setColor(QPalette.ColorRole[role], QColor(color))
+        QApplication.setPalette(palette)
+        os.environ.update(cached['environ'])
+    app.setStyleSheet(style_sheet)
@@ -0,0 +1,99 @@
+"""
+batch transcoding of songs with ffmpeg
+"""
+import os
+import queue
+import hashlib
+from threading import Thread, Event, Lock
+from concurrent.futures import ThreadPoolExecutor
+
+from .util import parse_args, run_ffmpeg
+from .cache import MetadataCache
+
+
+class BatchTranscoder:
+    """
+    converts many files to one format with an ffmpeg process per core, skipping outputs that the manifest shows
+    were already made from the same source with the same options
+    """
+    def __init__(self, sources, ftype, manifest, args='', workers=None):
+        self.sources = list(sources)  # (song or None, path) pairs
+        self.ftype = ftype
+        self.manifest = manifest  # a MetadataCache keyed by output path
+        self.args = args
+        self.workers = workers or os.cpu_count() or 1
+        self.results = queue.Queue()  # (song, output) for every file converted or already up to date
+        self.cancelled = Event()
+        self.converted = 0
+        self.skipped = 0
+        self.failed = 0
+        self.lock = Lock()  # guards the counts, which the pool threads update
+        self.finished = False
+        self.thread = Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    @property
+    def done(self):
+        return self.converted + self.skipped + self.failed
+
+    @staticmethod
+    def hash(path):
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            while chunk := f.read(1 << 20):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def output(self, source):
+        return '.'.join(source.split('.')[:-1]) + '.' + self.ftype
+
+    def up_to_date(self, source, output):
+        entry = self.manifest.get(output)
+        if entry is None or entry.get('source') != source or entry.get('options') != [self.ftype, self.args]:
+            return False
+        if entry.get('source_stat') == list(MetadataCache.stat(source)):
+            return True  # unchanged since it was hashed, so the hash would match too
+        return entry.get('hash') == self.hash(source)
+
+    def convert(self, song, source):
+        if self.cancelled.is_set():
+            return
+        output = self.output(source)
+        try:
+            if output == source or self.up_to_date(source, output):
+                with self.lock:
+                    self.skipped += 1
+                self.results.put((song, output))
+                return
+            digest = self.hash(source)
+            stat = list(MetadataCache.stat(source))
+            part = output[:-len(self.ftype)] + 'part.' + self.ftype  # keeps the extension ffmpeg picks the format from
+            try:
+                if not run_ffmpeg(['-i', source, '-vn'] + parse_args(self.args) + [part], self.cancelled):
+                    return
+                os.replace(part, output)
+            finally:
+                if os.path.exists(part):  # cancelled or failed, as a finished part has been renamed
+                    os.remove(part)
+            self.manifest.put(output, source=source, hash=digest, source_stat=stat, options=[self.ftype, self.args])
+            with self.lock:
+                self.converted += 1
+            self.results.put((song, output))
+        except Exception as e:
+            print(f'ERROR: Could not convert {source}: {e}')
+            with self.lock:
+                self.failed += 1
+
+    def run(self):
+        try:
+            with ThreadPoolExecutor(self.workers) as pool:
+                for song, source in self.sources:
+                    pool.submit(self.convert, song, source)
+        finally:
+            self.manifest.flush()
+            self.finished = True
@@ -0,0 +1,131 @@
+"""
+small helpers shared across the package: file formats, .slp lines, argument parsing, time formatting and running ffmpeg
+"""
+import os
+import subprocess
+
+
+audio_formats = ['mp3', 'flac', 'wav', 'ogg', 'wma', 'aac', 'alac']
+video_formats = ['mp4', 'flv', 'mkv', 'avi', 'mov', '3gp']
+
+
+def parse_slp_line(line):
+    """
+    turns a 'path::...;name::...;tags::...;weight::...' line of a .slp file into a dict
+    """
+    return {j.split('::')[0]: j.split('::')[1] for j in line.rstrip('\n').split(';')}
+
+
+def format_slp_line(song):
+    return f"path::{song.path};name::{song.name};tags::{', '.join(song.tags)};weight::{song.weight}\n"
+
+
+def parse_args(s): # turn '-f "foo \"bar" -b' into ['-f', 'foo "bar', '-b']
+    quotes = []
+    for pos, char in enumerate(s):
+        if char == '"' and (pos == 0 or s[pos-1] == '\\'):
+            quotes.append(pos)
+    if len(quotes) % 2 != 0:
+        print('Some arguments entered had incorrent quotation marks!')
+        return []
+    quotes = [(quotes[2*i], quotes[2*i+1]) for i in range(len(quotes)//2)]
+
+    def check_in_quotes(quotes, pos):
+        for pair in quotes:
+            if pair[0] < pos < pair[1]:
+                return True
+        return False
+
+    args = []
+    lastpos = 0
+    for pos, char in enumerate(s):
+        if char == ' ' and not check_in_quotes(quotes, pos):
+            args.append(s[lastpos:pos])
+            lastpos = pos+1
+    if lastpos < len(s) - 1:
+        args.append(s[lastpos:])
+
+    for pos, arg in enumerate(args):
+        if arg[0] == arg[-1] == ' ':
+            args[pos] = arg[1:-1]
+
+    return args
+
+
+def std_time(x, level=0):
+    if x is None:
+        return '--:--'
+    x = round(x)
+    def n(x):
+        x = str(x)
+        while len(x) < 2:
+            x = '0' + x
+        return x
+    if level == 0:
+        return f"{std_time(x // 60, level=1)}:{n(x % 60)}"
+    elif level == 1:
+        if x >= 60:
+            return f"{x//60}:{n(x % 60)}"
+        else:
+            return n(x)
+
+
+ffmpeg_path = None
+
+
+def ffmpeg_bin():
+    """
+    path of the ffmpeg executable bundled with pyffmpeg, looked up once
+    """
+    global ffmpeg_path
+    if ffmpeg_path is None:
+        from pyffmpeg import FFmpeg  # imported here as it is slow to load and most launches never run ffmpeg
+        ffmpeg_path = FFmpeg().get_ffmpeg_bin()
+    return ffmpeg_path
+
+
+def run_ffmpeg(args, cancelled, chunks=None):
+    """
+    runs an ffmpeg command, feeding it chunks on stdin if given, and kills it once cancelled is set;
+    returns whether it ran to completion, raising with ffmpeg's last error line if it failed
+    """
+    process = subprocess.Popen([ffmpeg_bin(), '-y', '-loglevel', 'error'] + args, stdin=subprocess.PIPE if chunks is not None else subprocess.DEVNULL,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        if chunks is not None:
+            for chunk in chunks:
+                if cancelled.is_set():
+                    break
+                process.stdin.write(chunk)
+            process.stdin.close()
+        while process.poll() is None and not cancelled.is_set():
+            try:
+                process.wait(0.1)
+            except subprocess.TimeoutExpired:
+                pass
+    except BrokenPipeError:  # ffmpeg stopped reading, its error message says why
+        process.wait()
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+    if cancelled.is_set():
+        return False
+    if process.returncode != 0:
+        raise Exception(process.stderr.read().decode(errors='replace').strip().split('\n')[-1])
+    return True
+
+
+def popen_low_priority(args, **kwargs):
+    """
+    subprocess.Popen for a process running below normal priority; elsewhere than Windows the priority is lowered once the
+    process has started, since a preexec_fn can deadlock the child while other threads are running
+    """
+    if os.name == 'nt':
+        return subprocess.Popen(args, creationflags=subprocess.BELOW_NORMAL_PRIORITY_CLASS, **kwargs)
+    process = subprocess.Popen(args, **kwargs)
+    try:
+        os.setpriority(os.PRIO_PROCESS, process.pid, 10)
+    except OSError:
+        pass  # it has already exited
+    return process
@@ -0,0 +1,53 @@
+"""
+the metadata cache's validation, persistence and eviction
+"""
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+from shellac.cache import MetadataCache
+
+
+class MetadataCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp() + '/'
+        self.files = []
+        for i in range(3):
+            self.files.append(f'{self.root}{i}.mp3')
+            with open(self.files[-1], 'wb') as f:
+                f.write(bytes(i))
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_hits_are_saved(self):
+        cache = MetadataCache(self.root + 'cache.json', max_entries=2)
+        for path in self.files[:2]:
+            cache.put(path, duration=1.0)
+        cache.flush()
+        time.sleep(0.01)
+        self.assertEqual(cache.get(self.files[0])['duration'], 1.0)
+        used = cache.entries[self.files[0]]['used']
+        cache.flush()  # the hit alone makes the cache dirty
+        cache = MetadataCache(self.root + 'cache.json', max_entries=2)
+        cache.load()
+        self.assertEqual(cache.entries[self.files[0]]['used'], used)
+        cache.put(self.files[2], duration=2.0)
+        cache.flush()
+        self.assertEqual(sorted(cache.entries), [self.files[0], self.files[2]])  # the least recently used entry went
+
+    def test_changed_files_miss(self):
+        cache = MetadataCache(self.root + 'cache.json')
+        cache.put(self.files[1], duration=1.0)
+        with open(self.files[1], 'ab') as f:
+            f.write(b'more')
+        self.assertIsNone(cache.get(self.files[1]))
+        self.assertNotIn(self.files[1], cache.entries)
+        os.remove(self.files[2])
+        self.assertIsNone(cache.get(self.files[2]))
+
+
+if __name__ == '__main__':
+    unittest.main()
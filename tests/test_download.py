@@ -0,0 +1,149 @@
+"""
+the download queue run against a local http server; converting needs the ffmpeg that pyffmpeg ships
+"""
+import os
+import time
+import wave
+import shutil
+import tempfile
+import unittest
+import functools
+import threading
+import http.server
+
+from shellac.download import DownloadManager
+
+
+class Handler(http.server.SimpleHTTPRequestHandler):
+    """
+    serves files from a folder, slowly for names containing 'slow' and only the first half for names containing 'dropped',
+    counting the transfers running at once
+    """
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    def log_message(self, *args):
+        pass
+
+    def copyfile(self, source, output):
+        with self.lock:
+            Handler.active += 1
+            Handler.peak = max(Handler.peak, Handler.active)
+        try:
+            if 'dropped' in self.path:  # the full Content-Length was promised, then the connection closes halfway
+                output.write(source.read(os.fstat(source.fileno()).st_size // 2))
+                return
+            while chunk := source.read(8192):
+                output.write(chunk)
+                if 'slow' in self.path:
+                    time.sleep(0.01)
+        except (BrokenPipeError, ConnectionResetError):  # the client cancelled
+            pass
+        finally:
+            with self.lock:
+                Handler.active -= 1
+
+
+def write_tone(path, seconds, rate=8000):
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(bytes(2 * rate * seconds))
+
+
+def wait_for(condition, timeout=30):
+    end = time.time() + timeout
+    while not condition():
+        if time.time() > end:
+            raise AssertionError('timed out')
+        time.sleep(0.01)
+
+
+class DownloadManagerTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.www, self.download_dir, self.song_dir = [os.path.join(self.root, i) + '/' for i in ('www', 'downloading', 'songs')]
+        for folder in (self.www, self.download_dir, self.song_dir):
+            os.makedirs(folder)
+        write_tone(self.www + 'tone.wav', 1)
+        write_tone(self.www + 'slow.wav', 100)  # takes seconds at the throttled rate
+        Handler.active = Handler.peak = 0
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(Handler, directory=self.www))
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f'http://127.0.0.1:{self.server.server_port}/'
+        self.manager = None
+
+    def tearDown(self):
+        if self.manager is not None:
+            self.manager.shutdown()
+            wait_for(lambda: not self.manager.active)
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def params(self, name, file='tone.wav', **changes):
+        params = {'url': self.base + file, 'name': name, 'start': '', 'end': '', 'tags': '', 'ftype': 'wav', 'yargs': '',
+                  'fiargs': '', 'foargs': '', 'weight': '1', 'deletevid': 'True', 'stream': 'False'}
+        params.update(changes)
+        return params
+
+    def test_jobs_keep_their_own_parameters(self):
+        self.manager = DownloadManager(self.download_dir, self.song_dir, workers=2)
+        params = self.params('first', tags='a', ftype='wav', weight='2')
+        first = self.manager.submit(params)
+        params.update(name='changed', tags='changed')  # the dialog reuses its dict for the next download
+        second = self.manager.submit(self.params('second', tags='b', ftype='flac', stream='True'))
+        wait_for(lambda: not self.manager.active)
+        self.assertEqual((first.name, first.params['tags'], first.params['weight']), ('first', 'a', '2'))
+        self.assertEqual([job.status for job in (first, second)], ['done', 'done'])
+        self.assertEqual(first.path, self.song_dir + 'first.wav')
+        self.assertEqual(second.path, self.song_dir + 'second.flac')
+        self.assertEqual(first.progress, 1.0)
+        self.assertEqual(second.progress, 1.0)
+        self.assertEqual(sorted(os.listdir(self.song_dir)), ['first.wav', 'second.flac'])
+        self.assertEqual(os.listdir(self.download_dir), [])
+        self.assertEqual(self.manager.results.qsize(), 2)
+
+    def test_workers_are_bounded(self):
+        self.manager = DownloadManager(self.download_dir, self.song_dir, workers=2)
+        jobs = [self.manager.submit(self.params(f'slow{i}', 'slow.wav')) for i in range(4)]
+        wait_for(lambda: sum(job.received > 0 for job in jobs) >= 2)
+        time.sleep(0.3)
+        self.assertEqual(Handler.peak, 2)
+        self.assertEqual(sorted(job.status for job in jobs), ['downloading', 'downloading', 'queued', 'queued'])
+
+    def test_progress_and_cancellation(self):
+        self.manager = DownloadManager(self.download_dir, self.song_dir, workers=2)
+        for stream in ('False', 'True'):
+            job = self.manager.submit(self.params(f'slow{stream}', 'slow.wav', stream=stream))
+            wait_for(lambda: job.received > 0)
+            progress = job.progress
+            wait_for(lambda: job.progress > progress)
+            job.cancel()
+            wait_for(lambda: job.finished)
+            self.assertEqual(job.status, 'cancelled')
+            self.assertLess(job.progress, 1)
+            self.assertIsNone(job.path)
+        self.assertEqual(os.listdir(self.download_dir), [])
+        self.assertEqual(os.listdir(self.song_dir), [])
+
+    def test_dropped_connection(self):
+        self.manager = DownloadManager(self.download_dir, self.song_dir, workers=2)
+        shutil.copy(self.www + 'tone.wav', self.www + 'dropped.wav')
+        jobs = [self.manager.submit(self.params(f'dropped{stream}', 'dropped.wav', stream=stream)) for stream in ('False', 'True')]
+        wait_for(lambda: all(job.finished for job in jobs))
+        self.assertEqual([job.status for job in jobs], ['failed', 'failed'])
+        self.assertEqual(os.listdir(self.download_dir), [])
+        self.assertEqual(os.listdir(self.song_dir), [])
+
+    def test_failed_download(self):
+        self.manager = DownloadManager(self.download_dir, self.song_dir, workers=2)
+        job = self.manager.submit(self.params('missing', 'missing.wav'))
+        wait_for(lambda: job.finished)
+        self.assertEqual(job.status, 'failed')
+
+
+if __name__ == '__main__':
+    unittest.main()
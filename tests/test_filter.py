@@ -0,0 +1,94 @@
+"""
+the compiled filters and the tag bitmaps checked against Filter.check and plain sets on random songs
+"""
+import random
+import unittest
+
+from shellac.filter import Filter, Bitmap, TagIndex
+from shellac.song import Song
+
+
+tags = ['rock', 'jazz', 'live', 'demo', 'a b', "it's"]
+
+
+def random_songs(rng, n):
+    return [Song(f'/music/{i}.mp3', f'song {i} {rng.choice(["x", "y", "xy", ""])}', rng.randint(0, 3),
+                 rng.sample(tags, rng.randint(0, 3)), 1.0) for i in range(n)]
+
+
+def random_filter(rng):
+    rules = [[(rng.choice(tags + ['missing']), rng.random() < 0.6) for _ in range(rng.randint(0, 3))]
+             for _ in range(rng.choice([0, 0, 1, 2, 3]))]
+    return Filter(rng.choice(['', '', 'x', 'y$', '^song 1', '[0-9]{2}']), rules, strict=rng.random() < 0.5)
+
+
+class FilterPlanTest(unittest.TestCase):
+    def test_evaluate_matches_check(self):
+        rng = random.Random(0)
+        for trial in range(500):
+            songs = random_songs(rng, rng.randint(0, 80))
+            filter = random_filter(rng)
+            expected = [filter.check(song) for song in songs]
+            plan = filter.compile()
+            self.assertEqual(plan.evaluate(songs).tolist(), expected, trial)
+            self.assertEqual(plan.evaluate(songs, TagIndex(songs)).tolist(), expected, trial)
+
+    def test_evaluate_skips_empty_slots(self):
+        rng = random.Random(1)
+        for trial in range(300):
+            songs = [song if rng.random() < 0.7 else None for song in random_songs(rng, rng.randint(0, 80))]
+            filter = random_filter(rng)
+            index = TagIndex()
+            for row, song in enumerate(songs):  # built row by row, as the playlist keeps it
+                if song is not None:
+                    index.add(row, song.tags)
+            for result in (filter.compile().evaluate(songs), filter.compile().evaluate(songs, index)):
+                self.assertEqual([ok for ok, song in zip(result.tolist(), songs) if song is not None],
+                                 [filter.check(song) for song in songs if song is not None], trial)
+                if filter.regex_enabled or filter.tags_enabled:
+                    self.assertFalse(any(ok for ok, song in zip(result.tolist(), songs) if song is None), trial)
+
+
+class BitmapTest(unittest.TestCase):
+    def test_against_sets(self):
+        rng = random.Random(3)
+        for trial in range(200):
+            spread = rng.choice([100, 5000, 100000])
+            a, b = ({rng.randrange(spread) for _ in range(rng.randint(0, 300))} for _ in range(2))
+            x, y = Bitmap(), Bitmap()
+            for i in a:
+                x.add(i)
+            y.update(sorted(b))
+            self.assertEqual(list(x), sorted(a))
+            self.assertEqual(list(y), sorted(b))
+            self.assertEqual(list(x & y), sorted(a & b))
+            self.assertEqual(list(x | y), sorted(a | b))
+            self.assertEqual(list(x - y), sorted(a - b))
+            self.assertEqual(len(x), len(a))
+            self.assertEqual(bool(y), bool(b))
+            self.assertEqual(x.to_mask(spread // 2).nonzero()[0].tolist(), sorted(i for i in a if i < spread // 2))
+            for i in rng.sample(sorted(a), len(a) // 2):
+                x.discard(i)
+                a.discard(i)
+            x.discard(spread)  # not in the bitmap
+            self.assertEqual(list(x), sorted(a))
+            self.assertTrue(all(i in x for i in a))
+            self.assertFalse(any(i in x for i in b - a))
+            self.assertEqual(set(x.chunks), {i >> Bitmap.SHIFT for i in a})  # emptied chunks are dropped
+
+    def test_tag_index_follows_songs(self):
+        rng = random.Random(4)
+        songs = random_songs(rng, 200)
+        index = TagIndex(songs)
+        for row in rng.sample(range(len(songs)), 50):
+            index.remove(row, songs[row].tags)
+            songs[row].tags = rng.sample(tags, rng.randint(0, 2))
+            index.add(row, songs[row].tags)
+        for tag in tags + ['missing']:
+            self.assertEqual(list(index.bitmap(tag)), [row for row, song in enumerate(songs) if tag in song.tags])
+            self.assertEqual(index.count(tag), sum(tag in song.tags for song in songs))
+        self.assertEqual(sorted(index.tags), sorted({tag for song in songs for tag in song.tags}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+duplicate detection by audio content, on files of random bytes with and without tags around them
+"""
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from shellac.index import ContentIndex, audio_payload
+from shellac.importer import FolderImporter
+
+
+def id3(size):
+    return b'ID3\x03\x00\x00' + bytes([size >> 21 & 0x7f, size >> 14 & 0x7f, size >> 7 & 0x7f, size & 0x7f]) + bytes(size)
+
+
+class ContentIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp() + '/'
+        rng = random.Random(0)
+        self.audio = [rng.randbytes(n) for n in (3000, 3000, 100000, 100000, 5000, 7000)]
+        os.makedirs(self.root + 'known')
+        os.makedirs(self.root + 'new')
+        for i, data in enumerate(self.audio):
+            with open(f'{self.root}known/{i}.mp3', 'wb') as f:
+                f.write(data)
+        self.known = [f'{self.root}known/{i}.mp3' for i in range(len(self.audio))]
+
+    def tearDown(self):
+        ContentIndex.cache = None
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def write(self, name, data):
+        with open(self.root + 'new/' + name, 'wb') as f:
+            f.write(data)
+        return self.root + 'new/' + name
+
+    def test_payload_ignores_tags(self):
+        data = id3(500) + self.audio[0] + b'TAG' + bytes(125)
+        start, end = audio_payload(data)
+        self.assertEqual(data[start:end], self.audio[0])
+
+    def test_known_files_hashed_only_on_a_length_match(self):
+        hashed = []
+        original = ContentIndex.hashes
+
+        def hashes(index, path, full=False):
+            hashed.append(path)
+            return original(index, path, full)
+        index = ContentIndex(self.known + [self.root + 'missing.mp3'])
+        ContentIndex.hashes = hashes
+        try:
+            tagged = self.write('tagged.mp3', id3(300) + self.audio[2])
+            self.assertEqual(index.duplicate_of(tagged), self.known[2])
+            self.assertIsNone(index.duplicate_of(self.write('other.mp3', bytes(50))))
+            self.assertEqual(index.duplicate_of(self.known[1]), self.known[1])
+        finally:
+            ContentIndex.hashes = original
+        looked_up = {len(self.audio[2]), len(self.audio[1])}
+        self.assertEqual(set(hashed) - {tagged, self.root + 'new/other.mp3'},
+                         {path for path, data in zip(self.known, self.audio) if len(data) in looked_up})
+        self.assertNotIn(self.known[4], hashed)
+
+    def test_importer_counts_duplicates(self):
+        for i, data in enumerate(self.audio):
+            self.write(f'copy{i}.mp3', id3(100) + data)
+        importer = FolderImporter(self.root + 'new', workers=4, existing=self.known)
+        importer.start()
+        importer.thread.join()
+        self.assertEqual(importer.found, len(self.audio))
+        self.assertEqual(importer.duplicates, len(self.audio))
+        self.assertTrue(importer.results.empty())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+"""
+the sqlite library store: saving and loading songs, and its sql filters checked against Filter.check
+"""
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from shellac.filter import Filter
+from shellac.importer import LibraryLoader
+from shellac.library import Library
+from shellac.song import Song
+
+
+tags = ['rock', 'jazz', 'live', 'demo', 'a b', "it's"]
+
+
+def random_songs(rng, n):
+    return [Song(f'/music/{i}.mp3', f'song {i} {rng.choice(["x", "y", "xy", ""])}', rng.randint(0, 3),
+                 rng.sample(tags, rng.randint(0, 3)), 1.0) for i in range(n)]
+
+
+def random_filter(rng):
+    rules = [[(rng.choice(tags + ['missing']), rng.random() < 0.6) for _ in range(rng.randint(0, 3))]
+             for _ in range(rng.choice([0, 0, 1, 2, 3]))]
+    return Filter(rng.choice(['', '', 'x', 'y$', '^song 1', '[0-9]{2}']), rules, strict=rng.random() < 0.5)
+
+
+class LibraryTest(unittest.TestCase):
+    def test_round_trip(self):
+        rng = random.Random(7)
+        songs = random_songs(rng, 100) + [Song('/music/untagged.mp3', 'untagged', 1, [], 2.5)]
+        with Library(':memory:') as library:
+            library.save(songs)
+            loaded = library.load()
+        self.assertEqual([(s.path, s.name, s.weight, s.tags, s.length) for s in loaded],
+                         [(s.path, s.name, s.weight, s.tags, s.length) for s in songs])
+
+    def test_where_matches_check(self):
+        rng = random.Random(2)
+        with Library(':memory:') as library:
+            for trial in range(200):
+                if trial % 20 == 0:
+                    songs = random_songs(rng, 60)
+                    library.save(songs)
+                filter = random_filter(rng)
+                self.assertEqual([song.name for song in library.load(filter)],
+                                 [song.name for song in songs if filter.check(song)], trial)
+
+
+class LibraryLoaderTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp() + '/'
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_stored_durations_are_not_probed(self):
+        songs = [Song(self.root + f'{i}.mp3', f'song {i}', 1, [], None if i % 4 == 0 else float(i), lazy=True) for i in range(20)]
+        for song in songs[:15]:  # the rest have gone missing
+            open(song.path, 'wb').close()
+        with Library(self.root + 'library.sldb') as library:
+            library.save(songs)
+        probed = []
+        original = Song.probe
+
+        def probe(path):
+            probed.append(path)
+            return 'title', 99.0
+        Song.probe = probe
+        try:
+            loader = LibraryLoader(self.root + 'library.sldb', workers=2, batch_size=7)
+            loader.start()
+            loader.thread.join()
+        finally:
+            Song.probe = original
+        updates = {}
+        while not loader.updates.empty():
+            updates.update((song.name, length) for song, length in loader.updates.get())
+        self.assertEqual(sorted(probed), sorted(song.path for song in songs if song.length is None))
+        self.assertEqual(updates, {song.name: 99.0 if song.length is None else song.length if i < 15 else None
+                                   for i, song in enumerate(songs)})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,282 @@
+"""
+the playlist and the structures behind it, checked against plain lists on random operations
+"""
+import random
+import bisect
+import unittest
+
+from shellac.filter import Filter
+from shellac.playlist import Playlist, PositionArray, WeightTree
+from shellac.song import Song
+
+
+def song(name, tags=(), weight=1):
+    return Song(f'/music/{name}.mp3', name, weight, list(tags), 1.0)
+
+
+def stepwise_move(rows, moving, k):
+    """
+    moves the songs one row at a time, |k| times, never past another moving song
+    """
+    rows = rows[:]
+    step = 1 if k > 0 else -1
+    for _ in range(abs(k)):
+        for i in (range(len(rows) - 1, -1, -1) if step > 0 else range(len(rows))):
+            j = i + step
+            if rows[i] in moving and 0 <= j < len(rows) and rows[j] not in moving:
+                rows[i], rows[j] = rows[j], rows[i]
+    return rows
+
+
+class PlaylistTestCase(unittest.TestCase):
+    def check_consistent(self, playlist, filter):
+        self.assertEqual(list(playlist), [song for song in playlist.list if filter.check(song)])
+        self.assertTrue(all(playlist.get_index(song) == i for i, song in enumerate(playlist.list)))
+        self.assertTrue(all(playlist.get_index(song.name) == i for i, song in enumerate(playlist.list)))
+        self.assertTrue(all(playlist.slot_songs[playlist.order[i]] is song for i, song in enumerate(playlist.list)))
+        self.assertEqual([playlist.get_row(song) for song in playlist], list(range(len(playlist))))
+        self.assertEqual(playlist.weights.total, sum(song.weight for song in playlist))
+
+
+class PlaylistIndexTest(PlaylistTestCase):
+    def test_mixed_operations(self):
+        rng = random.Random(3)
+        filter = Filter('1', [[('a', True)]], strict=False)
+        playlist = Playlist()
+        playlist.set_filter(filter)
+        names = iter(range(10 ** 6))
+        for trial in range(1500):
+            op = rng.random()
+            if op < 0.3:
+                playlist.add(song(f's{next(names)}', [rng.choice('ab')], rng.randint(1, 3)), rng.randint(0, len(playlist.list)))
+            elif op < 0.4:
+                playlist.extend([song(f's{next(names)}', [rng.choice('ab')]) for _ in range(rng.randint(1, 5))])
+            elif op < 0.55 and playlist.list:
+                playlist.delete(rng.choice(playlist.list))
+            elif op < 0.7 and len(playlist):
+                playlist.change_position(rng.choice(list(playlist)), rng.randint(0, len(playlist)))
+            elif op < 0.8 and len(playlist):
+                playlist.move(rng.sample(list(playlist), rng.randint(1, min(3, len(playlist)))), rng.randint(-3, 3))
+            elif op < 0.9 and playlist.list:
+                playlist.update(rng.choice(playlist.list).name, tags=[rng.choice('ab')], weight=rng.randint(0, 3))
+            self.check_consistent(playlist, filter)
+        self.assertIsNone(playlist.get_index('missing'))
+
+    def test_bulk_delete(self):
+        rng = random.Random(8)
+
+        class Rows:
+            """
+            mirrors the rows as a view would, from the removal notifications alone
+            """
+            def begin_remove(self, first, last):
+                self.removing = first, last
+
+            def end_remove(self):
+                first, last = self.removing
+                del self.rows[first:last + 1]
+                self.removes += 1
+        for trial in range(200):
+            playlist = Playlist([song(f's{i}', [rng.choice('ab')], rng.randint(0, 3)) for i in range(rng.randint(1, 60))])
+            filter = rng.choice([Filter(), Filter('', [[('a', True)]])])
+            playlist.set_filter(filter)
+            rows = Rows()
+            rows.rows, rows.removes = list(playlist), 0
+            playlist.listener = rows
+            for picked in rng.sample(list(playlist), rng.randint(0, len(playlist))):
+                playlist.select(picked)
+            removed = rng.sample(playlist.list, rng.randint(0, len(playlist.list)))
+            expected = [song for song in playlist.list if song not in removed]
+            removed_rows = [song in removed for song in playlist]
+            runs = sum(gone and (row == 0 or not removed_rows[row - 1]) for row, gone in enumerate(removed_rows))
+            picks = [rng.choice([song, song.name, playlist.list.index(song)]) for song in removed]
+            playlist.delete(picks + picks[:2])  # repeats are ignored
+            self.assertEqual(playlist.list, expected, trial)
+            self.assertEqual(rows.rows, list(playlist))
+            self.assertEqual(rows.removes, runs)  # one notification per contiguous run of rows
+            self.assertTrue(all(song not in playlist.names.values() and song not in playlist.selected for song in removed))
+            self.assertEqual(len(playlist.free_slots), len(removed))
+            self.check_consistent(playlist, filter)
+            playlist.listener = None
+            playlist.extend([song(f'new{i}', ['a']) for i in range(3)])  # freed slots are reused
+            self.check_consistent(playlist, filter)
+
+
+class PositionArrayTest(unittest.TestCase):
+    def test_against_sorted_list(self):
+        rng = random.Random(0)
+        expected = sorted(rng.sample(range(1000), 20))
+        positions = PositionArray(expected)
+        for trial in range(3000):
+            op = rng.random()
+            if op < 0.35:
+                new = rng.randrange(-50, 2000)
+                if new not in expected:
+                    self.assertEqual(positions.insert(new), bisect.bisect_left(expected, new))
+                    bisect.insort(expected, new)
+            elif op < 0.6 and expected:
+                old = rng.choice(expected)
+                self.assertEqual(positions.remove(old), expected.index(old))
+                expected.remove(old)
+            elif op < 0.75:
+                start, delta = rng.randrange(2000), rng.choice([-1, 1])
+                stop = rng.choice([None, start + rng.randrange(500)])
+                shifted = [i + delta if i >= start and (stop is None or i < stop) else i for i in expected]
+                if shifted == sorted(set(shifted)):  # the playlist only shifts where the order survives
+                    positions.shift(start, delta, stop)
+                    expected = shifted
+            elif op < 0.8:
+                extra = list(range((expected[-1] if expected else 0) + 1, (expected[-1] if expected else 0) + rng.randint(1, 40)))
+                positions.extend(extra)
+                expected.extend(extra)
+            self.assertEqual(len(positions), len(expected))
+            self.assertEqual(positions.array.tolist(), expected, trial)
+            probe = rng.randrange(-50, 2100)
+            self.assertEqual(positions.rank(probe), bisect.bisect_left(expected, probe))
+            self.assertEqual(positions.contains(probe), probe in expected)
+            if expected:
+                k = rng.randrange(-len(expected), len(expected))
+                self.assertEqual(positions.select(k), expected[k])
+        with self.assertRaises(IndexError):
+            positions.select(len(expected))
+
+    def test_filtered_view(self):
+        rng = random.Random(4)
+        playlist = Playlist([song(f's{i}', [rng.choice('ab')]) for i in range(200)])
+        playlist.set_filter(Filter('', [[('a', True)]]))
+        rows = [song for song in playlist.list if 'a' in song.tags]
+        self.assertEqual(list(playlist), rows)
+        self.assertEqual([playlist[row] for row in range(len(playlist))], rows)
+        self.assertEqual([playlist.get_unfiltered_position(row) for row in range(len(rows))], [playlist.list.index(song) for song in rows])
+        self.assertEqual([playlist.get_filtered_position(playlist.list.index(song)) for song in rows], list(range(len(rows))))
+        self.assertEqual(playlist.get_unfiltered_position(len(rows) + 5), playlist.list.index(rows[-1]))
+
+
+class WeightTreeTest(unittest.TestCase):
+    def test_against_list(self):
+        rng = random.Random(1)
+        weights = [rng.randint(0, 5) for _ in range(rng.randint(0, 30))]
+        tree = WeightTree(weights)
+        for trial in range(3000):
+            op = rng.random()
+            if op < 0.3:
+                weight = rng.randint(0, 5)
+                tree.append()
+                weights.append(0)
+                if weight:
+                    tree.set(len(weights) - 1, weight)
+                    weights[-1] = weight
+            elif op < 0.6 and weights:
+                slot = rng.randrange(len(weights))
+                weights[slot] = rng.randint(0, 5)
+                tree.set(slot, weights[slot])
+            elif op < 0.7 and weights:
+                items = [(rng.randrange(len(weights)), rng.randint(0, 5)) for _ in range(rng.randint(1, 10))]
+                tree.assign(items)
+                for slot, weight in items:
+                    weights[slot] = weight
+            elif op < 0.72:
+                for _ in range(rng.randint(1, 50)):  # enough to make the tree rebuild instead of catching up
+                    tree.append()
+                    weights.append(0)
+            self.assertEqual(len(tree), len(weights))
+            self.assertEqual(tree.total, sum(weights), trial)
+            k = rng.randint(0, len(weights))
+            self.assertEqual(tree.prefix(k), sum(weights[:k]))
+            if sum(weights):
+                x = rng.random() * sum(weights)
+                slot = tree.find(x)
+                self.assertLessEqual(sum(weights[:slot]), x)
+                self.assertLess(x, sum(weights[:slot + 1]))
+
+    def test_random_draws(self):
+        rng = random.Random(5)
+        playlist = Playlist([song(f's{i}', [rng.choice('ab')], rng.choice([0, 1, 3])) for i in range(30)])
+        playlist.set_filter(Filter('', [[('a', True)]]))
+        last = None
+        for _ in range(2000):
+            row, picked = playlist.random(last)
+            self.assertIs(playlist[row], picked)
+            self.assertIn('a', picked.tags)
+            if sum(song.weight for song in playlist if song is not last):
+                self.assertIsNot(picked, last)
+                self.assertGreater(picked.weight, 0)
+            last = picked
+
+
+class PlaylistSelectionTest(PlaylistTestCase):
+    def test_against_a_set(self):
+        rng = random.Random(6)
+        playlist = Playlist([song(f's{i}', [rng.choice('ab')]) for i in range(60)])
+        filter = Filter()
+        expected = set()
+        for trial in range(1000):
+            op = rng.random()
+            if op < 0.4:
+                picked = rng.choice(playlist.list)
+                playlist.select(picked)
+                if picked in playlist:
+                    expected.add(picked)
+            elif op < 0.7:
+                picked = rng.choice(playlist.list)
+                playlist.toggle_select(picked)
+                if picked in expected:
+                    expected.discard(picked)
+                elif picked in playlist:
+                    expected.add(picked)
+            elif op < 0.75:
+                filter = rng.choice([Filter(), Filter('', [[('a', True)]]), Filter('1')])
+                playlist.set_filter(filter)
+                expected = {picked for picked in expected if filter.check(picked)}
+            elif op < 0.8 and len(playlist.list) > 10:
+                removed = rng.sample(playlist.list, 2)
+                playlist.delete(removed)
+                expected -= set(removed)
+            elif op < 0.85:
+                picked = rng.choice(playlist.list)
+                playlist.update(picked.name, tags=[rng.choice('ab')])
+                if not filter.check(picked):
+                    expected.discard(picked)
+            elif op < 0.87:
+                playlist.clear_select()
+                expected.clear()
+            self.assertEqual(set(playlist.selected), expected, trial)
+            self.assertEqual(playlist.count_selected(), len(expected))
+            rows = sorted(list(playlist).index(picked) for picked in expected)
+            self.assertEqual(playlist.selected_rows(), rows)
+            ranges = [(first, last) for first, last in playlist.selected_ranges()]
+            self.assertEqual([row for first, last in ranges for row in range(first, last + 1)], rows)
+            self.assertTrue(all(b[0] > a[1] + 1 for a, b in zip(ranges, ranges[1:])))  # merged as far as they go
+        self.check_consistent(playlist, filter)
+
+
+class PlaylistMoveTest(PlaylistTestCase):
+    def test_move_matches_stepwise(self):
+        rng = random.Random(2)
+        for trial in range(500):
+            playlist = Playlist([song(f's{i}', [rng.choice('ab')]) for i in range(rng.randint(1, 25))])
+            filter = Filter('', [[('a', True)]]) if rng.random() < 0.5 else Filter()
+            playlist.set_filter(filter)
+            rows = list(playlist)
+            if not rows:
+                continue
+            moving = set(rng.sample(rows, rng.randint(1, len(rows))))
+            k = rng.choice([-1, 1, -2, 3, -len(rows), len(rows)])
+            hidden = [(i, s) for i, s in enumerate(playlist.list) if s not in playlist]
+            playlist.move(moving, k)
+            self.assertEqual(list(playlist), stepwise_move(rows, moving, k), trial)
+            self.assertEqual([(i, s) for i, s in enumerate(playlist.list) if s not in playlist], hidden)  # hidden songs stay put
+            self.check_consistent(playlist, filter)
+
+    def test_move_up_and_down(self):
+        playlist = Playlist([song(f's{i}') for i in range(5)])
+        playlist.move_up(3, 1, to_top=False)
+        self.assertEqual([s.name for s in playlist], ['s0', 's1', 's3', 's2', 's4'])
+        playlist.move_down(0, 1, to_bottom=True)
+        self.assertEqual([s.name for s in playlist], ['s1', 's3', 's2', 's4', 's0'])
+        playlist.move_up(4, 1, to_top=True)
+        self.assertEqual([s.name for s in playlist], ['s0', 's1', 's3', 's2', 's4'])
+
+
+if __name__ == '__main__':
+    unittest.main()
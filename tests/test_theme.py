@@ -0,0 +1,98 @@
+"""
+the cached theme checked against qt_material.apply_stylesheet, each launch in its own process as Qt's state is global
+"""
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+import subprocess
+import importlib.util
+
+
+launch = """
+import os, sys, json
+from PyQt6.QtCore import QDir
+from PyQt6.QtGui import QFontDatabase
+from PyQt6.QtWidgets import QApplication
+app = QApplication(['shellac', '-style', 'windows'])  # not the style qt_material sets, so a missing setStyle shows
+from shellac.theme import apply_theme, palette_colors, QSSLoader
+if sys.argv[2] == 'reference':  # run with HOME set to an empty folder, under which qt_material puts its icons by default
+    import qt_material
+    icons = os.path.join(os.path.expanduser('~'), '.qt_material', 'theme')
+    qt_material.apply_stylesheet(app, theme='dark_teal.xml')
+    app.setStyleSheet(app.styleSheet() + '\\n' + QSSLoader.read_qss_file(os.path.join(sys.argv[3], 'styles/default.qss')))
+else:
+    icons = os.path.abspath(os.path.join(sys.argv[1], 'icons'))
+    apply_theme(app, cache_dir=sys.argv[1])
+style_sheet = app.styleSheet()
+app.setStyleSheet('')  # app.style() is a stylesheet proxy until then
+print(json.dumps({
+    'style_sheet': style_sheet.replace(icons, '<icons>'),
+    'style': app.style().metaObject().className(),
+    'palette': palette_colors(),
+    'search_paths': {prefix: [i.replace(icons, '<icons>') for i in QDir.searchPaths(prefix)] for prefix in ('icon', 'qt_material')},
+    'fonts': sorted(QFontDatabase.families()),
+    'environ': {key: value for key, value in os.environ.items() if key.startswith('QTMATERIAL')},
+    'qt_material_loaded': 'qt_material' in sys.modules,
+}))
+"""
+
+
+@unittest.skipUnless(importlib.util.find_spec('PyQt6') and importlib.util.find_spec('qt_material'), 'needs PyQt6 and qt_material')
+class ApplyThemeTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def state(self, cache_dir, mode):
+        folder = os.path.join(self.root, cache_dir)
+        os.makedirs(folder, exist_ok=True)
+        result = subprocess.run([sys.executable, '-c', launch, folder, mode, self.repo], cwd=self.repo,
+                                env=dict(os.environ, QT_QPA_PLATFORM='offscreen', HOME=folder), capture_output=True, text=True, timeout=120)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return json.loads(result.stdout.splitlines()[-1])
+
+    def test_cached_launch_matches_qt_material(self):
+        reference = self.state('reference', 'reference')
+        built = self.state('cache', 'apply')
+        cached = self.state('cache', 'apply')
+        self.assertTrue(built.pop('qt_material_loaded'))
+        self.assertFalse(cached.pop('qt_material_loaded'))
+        reference.pop('qt_material_loaded')
+        self.assertEqual(built, reference)
+        self.assertEqual(cached, reference)
+        self.assertEqual(reference['style'], 'QFusionStyle')
+        self.assertEqual(sorted(os.listdir(os.path.join(self.root, 'cache', 'icons'))),
+                         sorted(os.listdir(os.path.join(self.root, 'reference', '.qt_material', 'theme'))))
+
+    def test_recording_leaves_qt_material_as_it_was(self):
+        from shellac.theme import build_theme, CallRecorder
+        import qt_material
+        originals = {name: getattr(qt_material, name) for name in CallRecorder.replayable}
+        build_stylesheet = qt_material.build_stylesheet
+
+        def failing(*args, **kwargs):
+            qt_material.QDir.addSearchPath('shellac-test', self.root)
+            raise ValueError('broken theme')
+        qt_material.build_stylesheet = failing
+        try:
+            with self.assertRaises(ValueError):
+                build_theme('dark_teal.xml', self.root)
+        finally:
+            qt_material.build_stylesheet = build_stylesheet
+        self.assertEqual({name: getattr(qt_material, name) for name in originals}, originals)
+        del qt_material.QDir
+        try:
+            with self.assertRaisesRegex(RuntimeError, 'QDir'):
+                build_theme('dark_teal.xml', self.root)
+        finally:
+            qt_material.QDir = originals['QDir']
+
+
+if __name__ == '__main__':
+    unittest.main()
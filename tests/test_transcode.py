@@ -0,0 +1,84 @@
+"""
+the batch transcoder: its counts, the manifest that skips finished outputs and the cleanup after failed conversions;
+converting needs the ffmpeg that pyffmpeg ships
+"""
+import io
+import os
+import wave
+import shutil
+import tempfile
+import threading
+import unittest
+import contextlib
+
+from shellac.cache import MetadataCache
+from shellac.transcode import BatchTranscoder
+from shellac.util import run_ffmpeg
+
+
+class BatchTranscoderTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp() + '/'
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_counts_from_many_workers(self):
+        sources = []
+        for i in range(2000):
+            path = f'{self.root}{i}.mp3'
+            if i % 4:
+                with open(path, 'wb') as f:
+                    f.write(b'')
+            else:
+                path = f'{self.root}{i}.wav'  # missing, so it fails when hashed
+            sources.append((None, path))
+        transcoder = BatchTranscoder(sources, 'mp3', MetadataCache(self.root + 'manifest'), workers=8)
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            transcoder.start()
+            transcoder.thread.join()
+        self.assertEqual(output.getvalue().count('ERROR: Could not convert'), 500)
+        self.assertEqual((transcoder.converted, transcoder.skipped, transcoder.failed), (0, 1500, 500))
+        self.assertEqual(transcoder.done, len(sources))
+        self.assertEqual(transcoder.results.qsize(), 1500)
+
+    def tone(self, name, frames=8000):
+        with wave.open(self.root + name, 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(8000)
+            f.writeframes(bytes(2 * frames))
+        return self.root + name
+
+    def transcode(self, sources, args=''):
+        manifest = MetadataCache(self.root + 'manifest')
+        manifest.load()
+        transcoder = BatchTranscoder([(None, source) for source in sources], 'flac', manifest, args, workers=2)
+        with contextlib.redirect_stdout(io.StringIO()):
+            transcoder.start()
+            transcoder.thread.join()
+        return transcoder
+
+    def test_manifest_skips_finished_outputs(self):
+        sources = [self.tone('a.wav'), self.tone('b.wav')]
+        first = self.transcode(sources)
+        self.assertEqual((first.converted, first.skipped, first.failed), (2, 0, 0))
+        self.assertTrue(all(os.path.getsize(source[:-3] + 'flac') > 0 for source in sources))
+        second = self.transcode(sources)  # a fresh manifest read back from disk, as on the next launch
+        self.assertEqual((second.converted, second.skipped, second.failed), (0, 2, 0))
+        self.tone('b.wav', 16000)
+        third = self.transcode(sources)
+        self.assertEqual((third.converted, third.skipped, third.failed), (1, 1, 0))
+
+    def test_failed_conversion_leaves_no_part(self):
+        run_ffmpeg(['-i', self.tone('whole.wav', 24000), self.root + 'broken.mp3'], threading.Event())
+        os.remove(self.root + 'whole.wav')
+        with open(self.root + 'broken.mp3', 'r+b') as f:  # garbage halfway, so ffmpeg fails after it started writing
+            f.seek(os.path.getsize(self.root + 'broken.mp3') // 2)
+            f.write(bytes(3000))
+        transcoder = self.transcode([self.root + 'broken.mp3', self.tone('fine.wav')], '-xerror')
+        self.assertEqual((transcoder.converted, transcoder.skipped, transcoder.failed), (1, 0, 1))
+        self.assertEqual(sorted(os.listdir(self.root)), ['broken.mp3', 'fine.flac', 'fine.wav', 'manifest'])
+
+if __name__ == '__main__':
+    unittest.main()